@@ -1,5 +1,19 @@
-import pyodbc
+import argparse
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
 import pandas as pd
+from openpyxl import Workbook
+
+import run_report
 
 # Database connection details for DEV, UAT, PROD (SSO authentication)
 environments = {
@@ -31,25 +45,567 @@ WHERE
     TABLE_TYPE IN ('BASE TABLE', 'VIEW')
 """
 
-# Function to establish connection and fetch data from a specific environment using SSO (Windows Authentication)
-def fetch_data(env_name, env_details):
+# SQL query for the same tables and views with their schema, used by the schema diff and the object list
+# reconciliation (the DWH has dwh. and dm. objects of the same name)
+qualified_objects_query = """
+SELECT
+    TABLE_TYPE AS Object_Type,
+    TABLE_SCHEMA AS Object_Schema,
+    TABLE_NAME AS Object_Name
+FROM
+    INFORMATION_SCHEMA.TABLES
+WHERE
+    TABLE_TYPE IN ('BASE TABLE', 'VIEW')
+"""
+
+# SQL query for the incremental snapshot mode: user tables and views created or modified since the high-water mark
+changed_objects_query = """
+SELECT
+    o.object_id AS Object_Id,
+    CASE o.type WHEN 'U' THEN 'BASE TABLE' ELSE 'VIEW' END AS Object_Type,
+    s.name AS Object_Schema,
+    o.name AS Object_Name,
+    o.modify_date AS Modify_Date
+FROM
+    sys.objects AS o
+    JOIN sys.schemas AS s ON s.schema_id = o.schema_id
+WHERE
+    o.type IN ('U', 'V') AND o.is_ms_shipped = 0 AND o.modify_date >= ?
+"""
+
+# SQL query for the ids of all user tables and views, to find the ones dropped since the last snapshot
+existing_ids_query = """
+SELECT
+    object_id AS Object_Id
+FROM
+    sys.objects
+WHERE
+    type IN ('U', 'V') AND is_ms_shipped = 0
+"""
+
+# SQL query for the column-level catalog: every column of every table and view with its PK / FK flags
+columns_query = """
+SELECT
+    c.TABLE_SCHEMA AS Table_Schema,
+    c.TABLE_NAME AS Table_Name,
+    c.COLUMN_NAME AS Column_Name,
+    c.ORDINAL_POSITION AS Ordinal_Position,
+    c.DATA_TYPE AS Data_Type,
+    c.CHARACTER_MAXIMUM_LENGTH AS Max_Length,
+    c.IS_NULLABLE AS Is_Nullable,
+    COALESCE(k.Is_PK, 0) AS Is_PK,
+    COALESCE(k.Is_FK, 0) AS Is_FK
+FROM
+    INFORMATION_SCHEMA.COLUMNS AS c
+    LEFT JOIN (
+        SELECT
+            ku.TABLE_SCHEMA,
+            ku.TABLE_NAME,
+            ku.COLUMN_NAME,
+            MAX(CASE WHEN tc.CONSTRAINT_TYPE = 'PRIMARY KEY' THEN 1 ELSE 0 END) AS Is_PK,
+            MAX(CASE WHEN tc.CONSTRAINT_TYPE = 'FOREIGN KEY' THEN 1 ELSE 0 END) AS Is_FK
+        FROM
+            INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS ku
+            JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
+                ON tc.CONSTRAINT_SCHEMA = ku.CONSTRAINT_SCHEMA AND tc.CONSTRAINT_NAME = ku.CONSTRAINT_NAME
+        GROUP BY
+            ku.TABLE_SCHEMA, ku.TABLE_NAME, ku.COLUMN_NAME
+    ) AS k
+        ON k.TABLE_SCHEMA = c.TABLE_SCHEMA AND k.TABLE_NAME = c.TABLE_NAME AND k.COLUMN_NAME = c.COLUMN_NAME
+ORDER BY
+    c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+# Defaults for fetching the environments
+CONNECT_TIMEOUT = 30    # Seconds to wait for the login to an environment
+QUERY_TIMEOUT = 600     # Seconds a single catalog query may run
+MAX_WORKERS = 4         # Environments fetched at the same time in concurrent mode
+MAX_IDLE_PER_ENV = 2    # Idle connections kept per environment for reuse
+SNAPSHOT_START = '1900-01-01 00:00:00.000'  # High-water mark of an empty snapshot, fetches everything
+SNAPSHOT_FORMAT = 2  # Layout of the snapshot files (PRAGMA user_version), 2 added the object schema
+FETCH_CHUNK_SIZE = 10000  # Rows per fetchmany() round trip in the column catalog mode
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet, a longer column catalog continues on the next sheet
+
+# Open a connection to one environment using SSO (Windows Authentication)
+def connect_odbc(env_details, connect_timeout=CONNECT_TIMEOUT, query_timeout=QUERY_TIMEOUT):
+    import pyodbc  # Imported here so the SQLite stand-in can be used without the ODBC driver
     conn_str = f"DRIVER={env_details['driver']};SERVER={env_details['server']};DATABASE={env_details['database']};Trusted_Connection=yes"
-    conn = pyodbc.connect(conn_str)
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+    conn = pyodbc.connect(conn_str, timeout=connect_timeout)
+    conn.timeout = query_timeout  # Applies to every statement run on this connection
+    return conn
+
+# Local stand-in for an environment: a SQLite file attached as INFORMATION_SCHEMA and sys, so the
+# catalog queries run unchanged (the file holds TABLES, COLUMNS, KEY_COLUMN_USAGE and
+# TABLE_CONSTRAINTS tables with the INFORMATION_SCHEMA column names, an objects table
+# with object_id / name / schema_id / type / modify_date / is_ms_shipped and a schemas
+# table with schema_id / name)
+def connect_sqlite(env_details, connect_timeout=CONNECT_TIMEOUT, query_timeout=QUERY_TIMEOUT):
+    conn = sqlite3.connect(':memory:', timeout=connect_timeout, check_same_thread=False)
+    conn.execute('ATTACH DATABASE ? AS INFORMATION_SCHEMA', (env_details['database'],))
+    conn.execute('ATTACH DATABASE ? AS sys', (env_details['database'],))
+    return conn
+
+def sqlite_environments(directory, env_names):
+    """Environment details pointing every environment at <directory>/<ENV>.db for the SQLite stand-in."""
+    return {env_name: {'database': os.path.join(directory, f'{env_name}.db')} for env_name in env_names}
+
+class ConnectionPool:
+    """Hands out connections per environment and keeps them open for reuse within one run.
+
+    Connections are opened lazily with the given factory (connect_odbc or a stand-in
+    such as connect_sqlite). A connection that raised while in use is closed instead
+    of being returned to the pool.
+    """
+
+    def __init__(self, environments, connect=connect_odbc, connect_timeout=CONNECT_TIMEOUT,
+                 query_timeout=QUERY_TIMEOUT, max_idle=MAX_IDLE_PER_ENV):
+        self.environments = environments
+        self.connect = connect
+        self.connect_timeout = connect_timeout
+        self.query_timeout = query_timeout
+        self.max_idle = max_idle
+        self.idle = {env_name: queue.LifoQueue() for env_name in environments}
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, env_name):
+        try:
+            conn = self.idle[env_name].get_nowait()
+        except queue.Empty:
+            conn = self.connect(self.environments[env_name], self.connect_timeout, self.query_timeout)
+            with self.lock:
+                self.opened += 1
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        if self.idle[env_name].qsize() < self.max_idle:
+            self.idle[env_name].put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        for idle in self.idle.values():
+            while not idle.empty():
+                idle.get_nowait().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Function to fetch data from a specific environment through a pooled connection
+def fetch_data(env_name, pool, sql=query):
+    with pool.connection(env_name) as conn:
+        return pd.read_sql(sql, conn)
+
+def format_modify_date(value):
+    """Render a modify_date as 'YYYY-MM-DD HH:MM:SS.fff', the text the snapshots store and compare."""
+    return pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+def modify_date_param(mark):
+    """The stored high-water mark as a datetime query parameter.
+
+    Sent as text, SQL Server would read 'YYYY-MM-DD ...' according to the session's
+    DATEFORMAT (dmy for Polish logins) and swap day and month.
+    """
+    return pd.Timestamp(mark).to_pydatetime()
+
+# The SQLite stand-in keeps modify_date as text, so datetime parameters are bound in the same format
+sqlite3.register_adapter(datetime, format_modify_date)
+
+def open_snapshot(snapshot_dir, env_name):
+    """Open (and create if needed) the local SQLite catalog snapshot of one environment.
+
+    A snapshot of an older layout (PRAGMA user_version) is emptied, so the next fetch reloads it in full.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    snapshot = sqlite3.connect(os.path.join(snapshot_dir, f'{env_name}_catalog.sqlite'))
+    if snapshot.execute('PRAGMA user_version').fetchone()[0] != SNAPSHOT_FORMAT:
+        snapshot.execute('DROP TABLE IF EXISTS objects')
+        snapshot.execute('DROP TABLE IF EXISTS snapshot_info')
+        snapshot.execute(f'PRAGMA user_version = {SNAPSHOT_FORMAT}')
+    snapshot.execute('CREATE TABLE IF NOT EXISTS objects (object_id INTEGER PRIMARY KEY, object_type TEXT, object_schema TEXT, object_name TEXT, modify_date TEXT)')
+    snapshot.execute('CREATE TABLE IF NOT EXISTS snapshot_info (key TEXT PRIMARY KEY, value TEXT)')
+    return snapshot
+
+def fetch_incremental(env_name, pool, snapshot_dir):
+    """Bring the snapshot of one environment up to date and return its tables and views.
+
+    Only objects modified since the stored high-water mark are fetched, plus the
+    list of object ids to find drops. The first run (empty snapshot) fetches the
+    full catalog.
+    """
+    snapshot = open_snapshot(snapshot_dir, env_name)
+    try:
+        row = snapshot.execute("SELECT value FROM snapshot_info WHERE key = 'high_water_mark'").fetchone()
+        high_water_mark = row[0] if row else None
+
+        with pool.connection(env_name) as conn:
+            changed = pd.read_sql(changed_objects_query, conn, params=[modify_date_param(high_water_mark or SNAPSHOT_START)])
+            existing_ids = pd.read_sql(existing_ids_query, conn)['Object_Id'] if high_water_mark else None
+
+        modify_dates = [format_modify_date(value) for value in changed['Modify_Date']]
+        with snapshot:  # Merge the changes in one transaction
+            snapshot.executemany('INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?)',
+                                 zip(changed['Object_Id'].astype(int).tolist(), changed['Object_Type'], changed['Object_Schema'],
+                                     changed['Object_Name'], modify_dates))
+            dropped = 0
+            if existing_ids is not None:
+                snapshot.execute('CREATE TEMP TABLE IF NOT EXISTS live_ids (object_id INTEGER PRIMARY KEY)')
+                snapshot.execute('DELETE FROM live_ids')
+                snapshot.executemany('INSERT INTO live_ids VALUES (?)', ((object_id,) for object_id in existing_ids.astype(int).tolist()))
+                dropped = snapshot.execute('DELETE FROM objects WHERE object_id NOT IN (SELECT object_id FROM live_ids)').rowcount
+            new_high_water_mark = max([mark for mark in [high_water_mark] + modify_dates if mark], default=None)
+            if new_high_water_mark:
+                snapshot.execute("INSERT OR REPLACE INTO snapshot_info VALUES ('high_water_mark', ?)", (new_high_water_mark,))
+
+        print(f"{env_name}: {len(changed)} new or modified, {dropped} dropped objects since {high_water_mark or 'empty snapshot'}")
+        return pd.read_sql('SELECT object_type AS Object_Type, object_schema AS Object_Schema, object_name AS Object_Name '
+                           'FROM objects ORDER BY object_schema, object_name', snapshot)
+    finally:
+        snapshot.close()
+
+def result_rows(outcome):
+    """Rows behind one fetch result: a DataFrame, an exported row count or a column index (table -> columns)."""
+    if isinstance(outcome, int):
+        return outcome
+    if isinstance(outcome, dict):
+        return sum(len(columns) for columns in outcome.values())
+    return len(outcome)
+
+def fetch_all(pool, fetch=fetch_data, workers=1):
+    """Fetch every environment of the pool, one at a time or with a bounded thread pool.
+
+    fetch(env_name, pool) returns the DataFrame of one environment (fetch_data by
+    default). Returns a dictionary of DataFrames keyed by environment name, in the
+    order of pool.environments. Environments that fail (login/query timeout,
+    connection error) are reported and left out.
+    """
+    env_names = list(pool.environments)
+    dfs = {}
+    stage_name = getattr(fetch, 'func', fetch).__name__  # Unwrap functools.partial for the run report
+
+    def timed_fetch(env_name, pool):
+        with run_report.stage(f'{stage_name} {env_name}') as stage:
+            outcome = fetch(env_name, pool)
+            stage.count(rows=result_rows(outcome))
+            return outcome
+
+    if workers <= 1:
+        outcomes = {}
+        for env_name in env_names:
+            try:
+                outcomes[env_name] = timed_fetch(env_name, pool)
+            except Exception as e:
+                outcomes[env_name] = e
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(env_names))) as executor:
+            futures = {env_name: executor.submit(timed_fetch, env_name, pool) for env_name in env_names}
+            outcomes = {env_name: future.exception() or future.result() for env_name, future in futures.items()}
+
+    for env_name in env_names:
+        if isinstance(outcomes[env_name], Exception):
+            print(f"Error: Could not fetch {env_name}: {outcomes[env_name]}")
+        else:
+            dfs[env_name] = outcomes[env_name]
+    return dfs
+
+def stream_query(conn, sql, chunk_size=FETCH_CHUNK_SIZE):
+    """Run a query and return its column names and a generator of row chunks from fetchmany()."""
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    header = [column[0] for column in cursor.description]
+
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    return header, chunks()
+
+def export_columns_to_excel(pool, output_file, chunk_size=FETCH_CHUNK_SIZE):
+    """Stream the column catalog of every environment into a write-only workbook.
+
+    Rows go from fetchmany() straight to the sheet, so only one chunk is held in
+    memory. Environments are written one after another ('<ENV>_Columns', then
+    '<ENV>_Columns_2', ... once a sheet is full). An environment that fails partway
+    has its sheets removed again, so the workbook never holds a truncated catalog.
+    Returns the row count per environment.
+    """
+    wb = Workbook(write_only=True)
+    counts = {}
+    for env_name in pool.environments:
+        env_sheets = []
+        try:
+            with run_report.stage(f'export_columns_to_excel {env_name}') as stage, pool.connection(env_name) as conn:
+                header, chunks = stream_query(conn, columns_query, chunk_size)
+                ws, sheet_rows, part, count = None, EXCEL_MAX_ROWS, 0, 0
+                for chunk in chunks:
+                    for row in chunk:
+                        if sheet_rows == EXCEL_MAX_ROWS:
+                            part += 1
+                            ws = wb.create_sheet(f'{env_name}_Columns' if part == 1 else f'{env_name}_Columns_{part}')
+                            env_sheets.append(ws)
+                            ws.append(header)
+                            sheet_rows = 1
+                        ws.append(list(row))
+                        sheet_rows += 1
+                    count += len(chunk)
+                if ws is None:  # Empty catalog: header only
+                    wb.create_sheet(f'{env_name}_Columns').append(header)
+                counts[env_name] = count
+                stage.count(rows=count, sheets=max(part, 1), cells=(count + max(part, 1)) * len(header))
+        except Exception as e:
+            for ws in env_sheets:
+                ws.close()  # Ends the sheet's row stream before it is dropped
+                wb.remove(ws)
+            print(f"Error: Could not fetch the columns of {env_name}: {e}"
+                  + (f" ({len(env_sheets)} partly written sheet(s) left out of the workbook)" if env_sheets else ''))
+    if counts:
+        with run_report.stage('save_columns_workbook'):
+            wb.save(output_file)
+    return counts
+
+def export_env_columns_to_csv(env_name, pool, output_stem, chunk_size=FETCH_CHUNK_SIZE):
+    """Stream the column catalog of one environment into <output_stem>_<ENV>.csv and return the row count."""
+    count = 0
+    with pool.connection(env_name) as conn:
+        header, chunks = stream_query(conn, columns_query, chunk_size)
+        with open(f'{output_stem}_{env_name}.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for chunk in chunks:
+                writer.writerows(chunk)
+                count += len(chunk)
+    return count
+
+# Column attributes compared by the schema diff (a change in any of them marks the column as changed)
+COLUMN_ATTRIBUTES = ['Ordinal_Position', 'Data_Type', 'Max_Length', 'Is_Nullable', 'Is_PK', 'Is_FK']
+DIFF_FIELDS = ['From', 'To', 'Change', 'Object_Type', 'Object_Name', 'Detail']
+
+def qualified_name(key):
+    """'schema.name' of an index key (schema, name), as shown in the Diff sheet."""
+    return '.'.join(key)
+
+def index_objects(df):
+    """Hash index of one environment's tables and views: (Object_Schema, Object_Name) -> Object_Type."""
+    return dict(zip(zip(df['Object_Schema'], df['Object_Name']), df['Object_Type']))
+
+def index_columns(env_name, pool, chunk_size=FETCH_CHUNK_SIZE):
+    """Hash index of one environment's columns, built from the streamed column catalog.
+
+    Returns (Table_Schema, Table_Name) -> {Column_Name: (attributes in COLUMN_ATTRIBUTES)}.
+    """
+    tables = {}
+    with pool.connection(env_name) as conn:
+        header, chunks = stream_query(conn, columns_query, chunk_size)
+        schema_pos, table_pos, column_pos = header.index('Table_Schema'), header.index('Table_Name'), header.index('Column_Name')
+        attribute_pos = [header.index(attribute) for attribute in COLUMN_ATTRIBUTES]
+        for chunk in chunks:
+            for row in chunk:
+                tables.setdefault((row[schema_pos], row[table_pos]), {})[row[column_pos]] = tuple(row[pos] for pos in attribute_pos)
+    return tables
+
+def diff_columns(source_columns, target_columns):
+    """Describe the column differences of one object, or return '' when they match."""
+    if source_columns == target_columns:
+        return ''
+    added = [column for column in target_columns if column not in source_columns]
+    removed = [column for column in source_columns if column not in target_columns]
+    changed = [column for column, attributes in source_columns.items()
+               if column in target_columns and target_columns[column] != attributes]
+    parts = [f'{label}: {", ".join(map(str, columns))}'
+             for label, columns in [('columns added', added), ('columns removed', removed), ('columns changed', changed)]
+             if columns]
+    return '; '.join(parts)
+
+def diff_environments(source_name, source, target_name, target, source_columns=None, target_columns=None):
+    """Compare two object indexes (and optionally their column indexes) in one pass over each.
+
+    'added' objects exist only in the target, 'removed' ones only in the source and
+    'changed' ones in both but with another type or other columns. Objects are keyed
+    by (schema, name) and reported as 'schema.name'. Returns a list of records with
+    the DIFF_FIELDS keys.
+    """
+    changes = []
+    for key, object_type in source.items():
+        if key not in target:
+            changes.append((source_name, target_name, 'removed', object_type, qualified_name(key), ''))
+            continue
+        detail = []
+        if target[key] != object_type:
+            detail.append(f'type {object_type} -> {target[key]}')
+        if source_columns is not None and target_columns is not None:
+            column_detail = diff_columns(source_columns.get(key, {}), target_columns.get(key, {}))
+            if column_detail:
+                detail.append(column_detail)
+        if detail:
+            changes.append((source_name, target_name, 'changed', target[key], qualified_name(key), '; '.join(detail)))
+    for key, object_type in target.items():
+        if key not in source:
+            changes.append((source_name, target_name, 'added', object_type, qualified_name(key), ''))
+    return [dict(zip(DIFF_FIELDS, change)) for change in changes]
+
+def diff_pairs(pairs, dfs, column_indexes=None):
+    """Run the schema diff for every (source, target) environment pair that was fetched.
+
+    dfs hold the tables and views with their schema (qualified_objects_query).
+    """
+    indexes = {env_name: index_objects(df) for env_name, df in dfs.items()}
+    records = []
+    for source_name, target_name in pairs:
+        if source_name not in indexes or target_name not in indexes:
+            print(f"Error: Cannot compare {source_name} with {target_name}, one of them was not fetched.")
+            continue
+        source_columns = column_indexes.get(source_name) if column_indexes else None
+        target_columns = column_indexes.get(target_name) if column_indexes else None
+        records.extend(diff_environments(source_name, indexes[source_name], target_name, indexes[target_name],
+                                         source_columns, target_columns))
+    return records
+
+def parse_diff_pairs(values, env_names):
+    """Turn ['DEV:UAT', ...] into pairs; no values compares each environment with the next one.
+
+    Raises ValueError for a value that is not SOURCE:TARGET of two known environments.
+    """
+    if not values:
+        return list(zip(env_names, env_names[1:]))
+    pairs = []
+    for value in values:
+        source_name, separator, target_name = value.partition(':')
+        if not separator or not source_name or not target_name:
+            raise ValueError(f"Invalid --diff pair '{value}', expected SOURCE:TARGET such as DEV:UAT.")
+        unknown = [env_name for env_name in (source_name, target_name) if env_name not in env_names]
+        if unknown:
+            raise ValueError(f"Unknown environment {', '.join(unknown)} in --diff pair '{value}' "
+                             f"(known: {', '.join(env_names)}).")
+        pairs.append((source_name, target_name))
+    return pairs
+
+# Export all data to a single Excel file with a separate sheet per environment (and the diff, if any)
+def export_to_excel(dfs, output_file, diff_records=None):
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        for env_name, df in dfs.items():
+            df.to_excel(writer, index=False, sheet_name=f'{env_name}_Tables_Views')
+        if diff_records is not None:
+            pd.DataFrame(diff_records, columns=DIFF_FIELDS).to_excel(writer, index=False, sheet_name='Diff')
+
+def main():
+    parser = argparse.ArgumentParser(description='Export tables and views of every environment to Excel.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='environments fetched at the same time (default 1: one after another)')
+    parser.add_argument('--concurrent', dest='workers', action='store_const', const=MAX_WORKERS,
+                        help=f'fetch up to {MAX_WORKERS} environments at the same time')
+    parser.add_argument('--connect-timeout', type=int, default=CONNECT_TIMEOUT, help='login timeout in seconds')
+    parser.add_argument('--query-timeout', type=int, default=QUERY_TIMEOUT, help='query timeout in seconds')
+    parser.add_argument('--sqlite', metavar='DIR', help='use the SQLite stand-in files DIR/<ENV>.db instead of the servers')
+    parser.add_argument('--snapshot-dir', metavar='DIR',
+                        help='keep catalog snapshots in DIR and only fetch objects changed since the last run')
+    parser.add_argument('--columns', action='store_true',
+                        help='export the column-level catalog with PK/FK flags, streamed in chunks (.xlsx or .csv output)')
+    parser.add_argument('--chunk-size', type=int, default=FETCH_CHUNK_SIZE, help='rows per fetch in --columns mode')
+    parser.add_argument('--diff', nargs='*', metavar='SOURCE:TARGET',
+                        help='add a Diff sheet and a <output>_diff.json comparing environment pairs '
+                             '(no pairs: each environment with the next one, e.g. DEV:UAT UAT:PROD)')
+    parser.add_argument('--diff-columns', action='store_true', help='also compare the columns of objects in --diff')
+    parser.add_argument('--output', help='file to write (default database_objects_dev_uat_prod.xlsx, '
+                                         'database_columns_dev_uat_prod.xlsx with --columns)')
+    parser.add_argument('--report', metavar='FILE', help='time every stage and write a JSON run report to FILE')
+    parser.add_argument('--trace-memory', action='store_true', help='add the tracemalloc peak per stage to --report (slower)')
+    args = parser.parse_args()
+
+    if args.report:
+        run_report.start(os.path.basename(__file__), args.trace_memory)
+    try:
+        run(args)
+    finally:
+        run_report.finish(args.report)
+
+def run(args):
+    """Export the tables and views (or the column catalog) of every environment."""
+    if args.sqlite:
+        env_details, connect = sqlite_environments(args.sqlite, environments), connect_sqlite
+    else:
+        env_details, connect = environments, connect_odbc
+
+    if args.columns:
+        export_columns(args, env_details, connect)
+        return
+
+    output_file = args.output or 'database_objects_dev_uat_prod.xlsx'
+
+    # Check the diff pairs before anything is fetched
+    if args.diff is not None:
+        try:
+            pairs = parse_diff_pairs(args.diff, list(env_details))
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+
+    # Fetch data for each environment and store it in a dictionary keyed by environment
+    diff_records = None
+    with ConnectionPool(env_details, connect, args.connect_timeout, args.query_timeout) as pool:
+        if args.snapshot_dir:
+            dfs = fetch_all(pool, partial(fetch_incremental, snapshot_dir=args.snapshot_dir), args.workers)
+        elif args.diff is not None:
+            # The diff needs the schema of every object, so the exported sheets get it too
+            dfs = fetch_all(pool, partial(fetch_data, sql=qualified_objects_query), args.workers)
+        else:
+            dfs = fetch_all(pool, workers=args.workers)
+
+        if args.diff is not None and dfs:
+            column_indexes = None
+            if args.diff_columns:
+                column_indexes = fetch_all(pool, partial(index_columns, chunk_size=args.chunk_size), args.workers)
+            with run_report.stage('diff_pairs') as stage:
+                diff_records = diff_pairs(pairs, dfs, column_indexes)
+                stage.count(rows=len(diff_records))
+
+    if not dfs:
+        print("Error: No environment could be fetched, nothing to export.")
+        return
+
+    with run_report.stage('export_to_excel') as stage:
+        export_to_excel(dfs, output_file, diff_records)
+        # Every sheet is a header row plus one row per object (or difference)
+        sheet_shapes = [(len(df), len(df.columns)) for df in dfs.values()]
+        if diff_records is not None:
+            sheet_shapes.append((len(diff_records), len(DIFF_FIELDS)))
+        stage.count(rows=sum(rows for rows, _ in sheet_shapes), sheets=len(sheet_shapes),
+                    cells=sum((rows + 1) * columns for rows, columns in sheet_shapes))
+
+    print(f"Exported tables and views from {', '.join(dfs)} to {output_file}")
 
-# Create a dictionary to store DataFrames for each environment
-dfs = {}
+    if diff_records is not None:
+        diff_file = f'{os.path.splitext(output_file)[0]}_diff.json'
+        with open(diff_file, 'w', encoding='utf-8') as f:
+            json.dump(diff_records, f, indent=2, default=str)
+        print(f"Found {len(diff_records)} differences, written to the Diff sheet and {diff_file}")
 
-# Fetch data for each environment and store it in the dictionary
-for env_name, env_details in environments.items():
-    dfs[env_name] = fetch_data(env_name, env_details)
+def export_columns(args, env_details, connect):
+    """Column catalog mode: stream every environment's columns to Excel or to one CSV per environment."""
+    output_file = args.output or 'database_columns_dev_uat_prod.xlsx'
+    with ConnectionPool(env_details, connect, args.connect_timeout, args.query_timeout) as pool:
+        if output_file.lower().endswith('.csv'):
+            # Separate files, so the environments can be streamed concurrently
+            export = partial(export_env_columns_to_csv, output_stem=os.path.splitext(output_file)[0], chunk_size=args.chunk_size)
+            counts = fetch_all(pool, export, args.workers)
+        else:
+            counts = export_columns_to_excel(pool, output_file, args.chunk_size)
+    if not counts:
+        print("Error: No environment could be fetched, nothing to export.")
+        return
 
-# Export all data to a single Excel file with separate sheets for DEV, UAT, and PROD
-output_file = 'database_objects_dev_uat_prod.xlsx'
-with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-    for env_name, df in dfs.items():
-        df.to_excel(writer, index=False, sheet_name=f'{env_name}_Tables_Views')
+    print(f"Exported columns from {', '.join(f'{env_name} ({count} rows)' for env_name, count in counts.items())} to {output_file}")
 
-print(f'Exported tables and views from DEV, UAT, and PROD to {output_file}')
+if __name__ == "__main__":
+    main()
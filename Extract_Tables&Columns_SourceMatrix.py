@@ -1,32 +1,38 @@
 # ------------------------------------------------------------------------------
-# Version: 1.6
-# Last updated: 2024-09-12
+# Version: 1.8
+# Last updated: 2026-10-17
 # Description: 
 # This script extracts entity column names and PK/FK information from an Excel 
 # file, applies formatting such as color-coding for different systems and PK/FK 
 # indicators, and saves the results to a new Excel file. Additionally, it creates 
 # a legend sheet with color codes for system identifiers and FK color. It also 
 # includes ASCII art for fun at the end.
+# The source workbook is streamed once in openpyxl read-only mode and only the
+# cells the extractor needs are kept per sheet (column A, column D from the
+# 'entity column name' marker onward and column G). The output workbook is
+# streamed in write-only mode with the formatting applied as cells are written.
+# With --format parquet/arrow the extracted model is also written in long form
+# (one row per sheet and entity column) for tools that don't read Excel.
 # ------------------------------------------------------------------------------
 
+import argparse
+import numpy as np
 import pandas as pd
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font
-
-# Path to the source Excel file (use raw string)
-source_file = r'c:\\python\\DWH_Source_Matrix (2).xlsx'
-
-# Get the current timestamp in the format YYYYMMDD_HHMMSS
-timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-# Define the output file path with the timestamp appended to the file name (use raw string)
-output_file = rf'c:\\python\\DWH_Entity_Columns_Output_{timestamp}.xlsx'
-
-# Load the Excel file
-excel_file = pd.ExcelFile(source_file)
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment, NamedStyle
+import run_report
+from source_matrix_cache import SheetCache, MISSING, cache_version, default_cache_file, find_workbooks, output_stems, worksheet_titles
+
+# Cell texts that pd.read_excel reads as NaN, so the streaming reader sees the same blanks
+NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
 
 # Ensure the color is in aRGB format (prepend 'FF' for fully opaque colors)
 def convert_to_argb(rgb_hex):
@@ -45,131 +51,299 @@ system_color_map = {
     '09': ('AccountItemMap.xlsx', convert_to_argb('F4CCCC'))  # Light Red for AccountItemMap.xlsx
 }
 
-# Initialize a dictionary to store the extracted columns and PK/FK info for each sheet
-extracted_columns = {}
-pk_fk_info_columns = {}
-
-# Loop through each sheet to find 'entity column name' and extract additional info, including system identifier
-for sheet in excel_file.sheet_names:
-    df = pd.read_excel(source_file, sheet_name=sheet)
-
-    if df.shape[1] > 6:
-        # Look for the cell that contains 'entity column name' (case insensitive) in column D
-        entity_row = df[df.iloc[:, 3].str.contains('entity column name', case=False, na=False)]
-
-        if not entity_row.empty:
-            start_index = entity_row.index[0] + 1
-
-            entity_columns = []
-            pk_fk_info = []
-            for idx, value in df.iloc[start_index:, 3].items():
-                if pd.isna(value):  # Stop when an empty cell is encountered
-                    break
-                entity_columns.append(value)
-
-                description = df.iloc[idx, 6]  # Column G for description
-                source_system = 'DWH'  # Default to DWH (light purple) for unrecognized systems
-                color = convert_to_argb('EAD1DC')  # Default color for DWH (light purple)
-
-                # If a PK or FK is found, search column A for the matching entity column
-                if not pd.isna(description) and ('primary key' in description.lower() or 'unique key' in description.lower()):
-                    # Search for the matching entity column name in column A
-                    entity_name = value
-                    match_row = None
-                    for search_idx, search_value in df.iloc[:, 0].items():
-                        if search_value == entity_name:
-                            match_row = search_idx
-                            break
-
-                    if match_row is not None and match_row < len(df) - 1:
-                        # Look in the row below for the source system identifier in column A
-                        column_a_value = str(df.iloc[match_row + 1, 0])
-                        if len(column_a_value) >= 2:
-                            source_system_id = column_a_value[-2:]  # Extract the last two characters
-                            if source_system_id in system_color_map:
-                                source_system, color = system_color_map[source_system_id]
-
-                # Initialize the dictionary to hold information for each column
-                column_info = {
-                    'type': '',
-                    'custom_identifier': '',
-                    'description': str(description) if not pd.isna(description) else '',
-                    'source_system': source_system,
-                    'color': color
-                }
-
-                # Determine PK or FK status with custom identifier
-                if pd.isna(description):
-                    column_info['type'] = ''  # Neither PK nor FK
-                elif re.search(r'\bPK\b', str(description), re.IGNORECASE) or \
-                        any(kw in str(description).lower() for kw in ['primary key', 'unique identifier', 'unique key']):
-                    column_info['type'] = 'PK'
-                    column_info['custom_identifier'] = f'PK{len(pk_fk_info) + 1:02d}'  # Assign 'PK01', 'PK02', etc.
-                elif 'fk' in str(description).lower() or 'foreign key' in str(description).lower():
-                    column_info['type'] = 'FK'
-                    column_info['custom_identifier'] = f'FK{len(pk_fk_info) + 1:02d}'  # Assign 'FK01', 'FK02', etc.
-
-                # Add the column info to the pk_fk_info list for this sheet
-                pk_fk_info.append(column_info)
-
-            # Store the extracted entity column names and PK/FK info for the current sheet
-            extracted_columns[sheet] = entity_columns
-            pk_fk_info_columns[sheet] = pk_fk_info
-
-# Create a DataFrame for Sheet 1
-extracted_df = pd.DataFrame.from_dict(extracted_columns, orient='index').transpose()
-
-# Save the extracted columns to a new Excel file (Sheet 1)
-with pd.ExcelWriter(output_file) as writer:
-    extracted_df.to_excel(writer, sheet_name='Extracted Columns', index=False)
-
-# Now, open the newly created Excel file for coloring and modifications
-wb = load_workbook(output_file)
-ws = wb['Extracted Columns']  # Open Sheet 1 for coloring
-
-# Define new fill colors for FK and system colors for PK
-fk_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")  # Light gray for FK
-red_font = Font(color="FF0000", bold=True)  # Red font for the sheet name if multiple PKs
-pk_bold_font = Font(bold=True)  # Bold font for PK
-
-# Track the number of PKs per sheet
-pk_count = {}
-
-# Loop through the extracted columns and apply coloring based on PK/FK detection
-for sheet_name, entity_columns in extracted_columns.items():
-    pk_fk_info = pk_fk_info_columns[sheet_name]  # Get corresponding PK/FK info for this sheet
-
-    # Add hyperlinks for the sheet name
-    hyperlink_formula = f'=HYPERLINK("#\'{sheet_name}\'!A1", "{sheet_name}")'
-    ws.cell(row=1, column=list(extracted_columns.keys()).index(sheet_name) + 1, value=hyperlink_formula)
-
-    for idx, entity_column in enumerate(entity_columns):
-        # Get the PK/FK info for the corresponding entity column
-        pk_fk = pk_fk_info[idx]
-
-        if pk_fk['type'] == 'PK':  # If it's a Primary Key
-            # Apply the color specific to the PK based on its source system
-            if len(pk_fk['color']) == 8:  # Ensure color is valid aRGB hex
-                cell = ws.cell(row=idx + 2, column=list(extracted_columns.keys()).index(sheet_name) + 1)
-                cell.fill = PatternFill(start_color=pk_fk['color'], end_color=pk_fk['color'], fill_type="solid")
-                cell.font = pk_bold_font  # Make PK bold
-        
-        elif pk_fk['type'] == 'FK':  # If it's a Foreign Key
-            # Apply the fixed FK color
-            cell = ws.cell(row=idx + 2, column=list(extracted_columns.keys()).index(sheet_name) + 1)
-            cell.fill = fk_fill
-
-# Create a new sheet for the legend
-legend_ws = wb.create_sheet('Legend')
-
-# Add legend horizontally:
-# A1: 'PK:', B1 to I1: Color-coded systems, J1: 'FK:', K1: Foreign Key color coding
-legend_ws['A1'] = 'PK:'
-legend_ws['J1'] = 'FK:'
-legend_ws['A1'].font = pk_bold_font
-legend_ws['J1'].font = pk_bold_font
-
-# Add system colors to B1 to I1 and FK color to K1
+def is_blank(value):
+    """Return True for cell values that pd.read_excel would turn into NaN."""
+    return value is None or (isinstance(value, str) and value in NA_VALUES)
+
+def used_width(row):
+    """Number of cells in a row up to the last non-empty one (same trimming as pd.read_excel)."""
+    width = len(row)
+    while width and (row[width - 1] is None or row[width - 1] == ''):
+        width -= 1
+    return width
+
+def read_sheet_cells(ws):
+    """Read one worksheet in a single pass and keep only columns A, D (from the marker) and G.
+
+    The first row is treated as the header row, like pd.read_excel does, so row
+    positions in the returned column A list match the old DataFrame index.
+    Returns (column_a, entity_values, descriptions), or None if the sheet has no
+    more than 6 used columns or no 'entity column name' marker in column D.
+    """
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return None
+
+    width = used_width(header)
+    column_a = []
+    entity_values, descriptions = [], []
+    marker_found = collecting = False
+
+    for row in rows:
+        width = max(width, used_width(row))
+        column_a.append(None if not row or is_blank(row[0]) else row[0])
+        value = row[3] if len(row) > 3 else None
+
+        if collecting:
+            if is_blank(value):  # Stop when an empty cell is encountered
+                collecting = False
+            else:
+                entity_values.append(value)
+                description = row[6] if len(row) > 6 else None  # Column G for description
+                descriptions.append(None if is_blank(description) else description)
+        elif not marker_found and isinstance(value, str) and 'entity column name' in value.lower():
+            marker_found = collecting = True
+
+    if width <= 6 or not marker_found:
+        return None
+    return column_a, entity_values, descriptions
+
+def iter_sheet_cells(source_file, titles=None):
+    """Stream the source workbook once (read-only) and yield (sheet, cells or None) for each sheet.
+
+    With titles, only those sheets are parsed; the others are skipped without being read.
+    """
+    wb = load_workbook(source_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        for ws in wb.worksheets:
+            if titles is not None and ws.title not in titles:
+                continue
+            ws.reset_dimensions()  # Don't trust the stored dimension, scan the rows that are really there
+            yield ws.title, read_sheet_cells(ws)
+    finally:
+        wb.close()
+
+def read_source_sheets(source_file, titles=None):
+    """Yield (sheet, column_a, entity_values, descriptions) for every sheet that has entity columns."""
+    for sheet, cells in iter_sheet_cells(source_file, titles):
+        if cells is not None:
+            yield (sheet,) + cells
+
+# Sheets per process pool task in batch mode, so very large workbooks are spread over several processes
+SHARD_SIZE = 100
+
+# Keywords that mark a description as PK / FK, and the subset that triggers the source system lookup
+PK_KEYWORDS = ['primary key', 'unique identifier', 'unique key']
+FK_KEYWORDS = ['fk', 'foreign key']
+SOURCE_LOOKUP_KEYWORDS = ['primary key', 'unique key']
+
+# Version of the cached 'entity' results: bump the first number when the parsing or classification changes
+ENTITY_CACHE_VERSION = cache_version(1, PK_KEYWORDS, FK_KEYWORDS, SOURCE_LOOKUP_KEYWORDS, system_color_map, sorted(NA_VALUES))
+
+# Build a regex alternation that matches any of the keywords literally
+def keyword_pattern(keywords):
+    return '|'.join(re.escape(kw) for kw in keywords)
+
+def build_entity_frames(sheets):
+    """Gather the cells of every sheet into one entity frame and one column A frame."""
+    sheet_names = []
+    entities = {'sheet': [], 'entity_column': [], 'description': []}
+    column_a_cells = {'sheet': [], 'value': [], 'below': []}
+
+    for sheet, column_a, entity_values, descriptions in sheets:
+        sheet_names.append(sheet)
+        entities['sheet'].extend([sheet] * len(entity_values))
+        entities['entity_column'].extend(entity_values)
+        entities['description'].extend(descriptions)
+        # Each column A value next to the value of the row below it (the source system id)
+        column_a_cells['sheet'].extend([sheet] * len(column_a))
+        column_a_cells['value'].extend(column_a)
+        column_a_cells['below'].extend(column_a[1:] + [None] if column_a else [])
+
+    entity_df = pd.DataFrame({key: pd.Series(values, dtype=object) for key, values in entities.items()})
+    column_a_df = pd.DataFrame({key: pd.Series(values, dtype=object) for key, values in column_a_cells.items()})
+    return sheet_names, entity_df, column_a_df
+
+def source_system_lookup(column_a_df):
+    """First occurrence of every column A value per sheet, with the source system read from the row below."""
+    first = column_a_df[column_a_df['value'].notna()].drop_duplicates(subset=['sheet', 'value'])
+
+    # Work out the system id once per distinct 'row below' value: the last two characters of its text
+    codes, below_values = pd.factorize(first['below'])
+    below = pd.Series([str(value) for value in below_values], dtype=object)
+    system_id = below.str[-2:].where(below.str.len() >= 2)
+    system = np.append(system_id.map({key: system for key, (system, _) in system_color_map.items()}).to_numpy(), None)
+    color = np.append(system_id.map({key: color for key, (_, color) in system_color_map.items()}).to_numpy(), None)
+
+    lookup = pd.DataFrame({
+        'sheet': first['sheet'].to_numpy(),
+        'entity_column': first['value'].to_numpy(),
+        'lookup_system': system[codes],
+        'lookup_color': color[codes]
+    })
+    return lookup[lookup['lookup_system'].notna()]
+
+def classify_descriptions(descriptions):
+    """Flag description texts as PK, FK and source-system-lookup with vectorized string ops."""
+    descriptions = pd.Series(descriptions, dtype=object)
+    lowered = descriptions.str.lower()
+    is_pk = (descriptions.str.contains(r'\bPK\b', case=False, regex=True)
+             | lowered.str.contains(keyword_pattern(PK_KEYWORDS), regex=True))
+    is_fk = ~is_pk & lowered.str.contains(keyword_pattern(FK_KEYWORDS), regex=True)
+    needs_lookup = lowered.str.contains(keyword_pattern(SOURCE_LOOKUP_KEYWORDS), regex=True)
+    return is_pk.to_numpy(dtype=bool), is_fk.to_numpy(dtype=bool), needs_lookup.to_numpy(dtype=bool)
+
+def classify_entity_columns(entity_df, column_a_df):
+    """Assign PK/FK type, custom identifier and source system to every entity row across all sheets."""
+    # Descriptions repeat a lot ('PK', 'Foreign key', ...), so the string checks run on the distinct texts only.
+    # Missing descriptions get code -1, which picks the trailing '' / False appended to each lookup array.
+    codes, distinct = pd.factorize(entity_df['description'])
+    texts = [str(text) for text in distinct] + ['']
+    is_pk, is_fk, needs_lookup = (np.append(flags, False)[codes]
+                                  for flags in classify_descriptions(texts[:-1]))
+    description = np.array(texts, dtype=object)[codes]
+
+    # Identifiers number the column's position in its sheet: 'PK01', 'FK02', etc.
+    position = entity_df.groupby('sheet', sort=False).cumcount() + 1
+    column_type = np.full(len(entity_df), '', dtype=object)
+    column_type[is_pk] = 'PK'
+    column_type[is_fk] = 'FK'
+    typed = is_pk | is_fk
+    custom_identifier = np.full(len(entity_df), '', dtype=object)
+    custom_identifier[typed] = column_type[typed] + position[typed].map('{:02d}'.format).to_numpy()
+
+    # PK/unique key columns take the source system from column A, everything else defaults to DWH (light purple)
+    source_system = np.full(len(entity_df), 'DWH', dtype=object)
+    color = np.full(len(entity_df), convert_to_argb('EAD1DC'), dtype=object)
+    lookup_rows = np.flatnonzero(needs_lookup)
+    matched = entity_df[['sheet', 'entity_column']].iloc[lookup_rows].merge(
+        source_system_lookup(column_a_df), on=['sheet', 'entity_column'], how='left')
+    found = matched['lookup_system'].notna().to_numpy()
+    source_system[lookup_rows[found]] = matched['lookup_system'].to_numpy()[found]
+    color[lookup_rows[found]] = matched['lookup_color'].to_numpy()[found]
+
+    return pd.DataFrame({
+        'sheet': entity_df['sheet'],
+        'entity_column': entity_df['entity_column'],
+        'type': column_type,
+        'custom_identifier': custom_identifier,
+        'description': description,
+        'source_system': source_system,
+        'color': color
+    }, index=entity_df.index)
+
+def split_by_sheet(sheet_names, classified):
+    """Split the classified rows back into per-sheet lists, keeping the sheet order of the workbook."""
+    extracted_columns = {sheet: [] for sheet in sheet_names}
+    pk_fk_info_columns = {sheet: [] for sheet in sheet_names}
+    info_fields = ['type', 'custom_identifier', 'description', 'source_system', 'color']
+    for sheet, entity_column, *info in zip(classified['sheet'].tolist(), classified['entity_column'].tolist(),
+                                           *(classified[field].tolist() for field in info_fields)):
+        extracted_columns[sheet].append(entity_column)
+        pk_fk_info_columns[sheet].append(dict(zip(info_fields, info)))
+
+    return extracted_columns, pk_fk_info_columns
+
+def extract_sheets(source_file, titles=None):
+    """Parse and classify the given sheets (all of them by default)."""
+    with run_report.stage('read_source_sheets') as stage:
+        sheet_names, entity_df, column_a_df = build_entity_frames(read_source_sheets(source_file, titles))
+        stage.count(rows=len(entity_df) + len(column_a_df), sheets=len(sheet_names))
+    with run_report.stage('classify_entity_columns') as stage:
+        classified = classify_entity_columns(entity_df, column_a_df)
+        stage.count(rows=len(classified), sheets=len(sheet_names))
+    return split_by_sheet(sheet_names, classified)
+
+def cached_entries(source_file, cache=None):
+    """Per-sheet entries taken from the cache, in workbook order, with MISSING for every sheet to parse."""
+    if cache is None:
+        return {sheet: MISSING for sheet in worksheet_titles(source_file)}
+    return {sheet: cache.get(sheet, 'entity') for sheet in cache.open(source_file)}
+
+def merge_entries(entries, parsed, cache=None):
+    """Fill the MISSING entries from the parsed (extracted_columns, pk_fk_info_columns) results.
+
+    The merge follows the workbook order of entries, never the order the results
+    came in, so sharded and serial runs give the same output.
+    """
+    parsed_entries = {}
+    for extracted_columns, pk_fk_info_columns in parsed:
+        for sheet, entity_columns in extracted_columns.items():
+            parsed_entries[sheet] = (entity_columns, pk_fk_info_columns[sheet])
+
+    extracted_columns, pk_fk_info_columns = {}, {}
+    for sheet, entry in entries.items():
+        if entry is MISSING:
+            # Sheets without entity columns are cached as None, so they are not parsed again either
+            entry = parsed_entries.get(sheet)
+            if cache is not None:
+                cache.put(sheet, 'entity', entry)
+        if entry is not None:
+            extracted_columns[sheet], pk_fk_info_columns[sheet] = entry
+    return extracted_columns, pk_fk_info_columns
+
+def extract_source_matrix(source_file, cache=None):
+    """Extract entity columns and PK/FK info for every sheet of the Source Matrix.
+
+    With a SheetCache, only sheets whose content changed since the last run are parsed.
+    Every sheet is classified on its own, so cached and fresh sheets combine to the same result.
+    """
+    if cache is None:
+        return extract_sheets(source_file)
+
+    with run_report.stage('sheet_cache') as stage:
+        entries = cached_entries(source_file, cache)
+        stage.count(sheets=len(entries))
+    changed = {sheet for sheet, entry in entries.items() if entry is MISSING}
+    return merge_entries(entries, [extract_sheets(source_file, changed)] if changed else [], cache)
+
+def extract_batch(source_files, output_dir, timestamp, workers=None, shard_size=SHARD_SIZE, use_cache=True, formats=('xlsx',)):
+    """Extract many Source Matrix workbooks on a process pool and save one output file per workbook.
+
+    Every workbook is split into shards of shard_size sheets that are still to be
+    parsed; all shards of all workbooks run on the same pool. Every workbook is
+    saved in each of the given formats. Returns the output files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = []
+    # Stages run in the worker processes are not part of the run report, the batch as a whole is
+    with run_report.stage('extract_batch') as stage, ProcessPoolExecutor(max_workers=workers) as executor:
+        stage.count(sheets=len(source_files))
+        jobs = []
+        for source_file, stem in zip(source_files, output_stems(source_files)):
+            cache = None
+            try:
+                cache = SheetCache(default_cache_file(source_file), {'entity': ENTITY_CACHE_VERSION}) if use_cache else None
+                entries = cached_entries(source_file, cache)
+            except Exception as e:
+                # Unreadable workbook (not an .xlsx, locked, ...): skip it, the rest of the batch goes on
+                print(f"Error: Could not extract '{source_file}': {e}")
+                if cache is not None:
+                    cache.close()
+                continue
+            changed = [sheet for sheet, entry in entries.items() if entry is MISSING]
+            shards = [set(changed[start:start + shard_size]) for start in range(0, len(changed), shard_size)]
+            jobs.append((source_file, stem, cache, entries, [executor.submit(extract_sheets, source_file, shard) for shard in shards]))
+
+        saves = []
+        for source_file, stem, cache, entries, futures in jobs:
+            try:
+                extracted_columns, pk_fk_info_columns = merge_entries(entries, [future.result() for future in futures], cache)
+            except Exception as e:
+                print(f"Error: Could not extract '{source_file}': {e}")
+                continue
+            finally:
+                if cache is not None:
+                    cache.close()
+                    print(f"{os.path.basename(source_file)}: {cache.report()}")
+            output_stem = os.path.join(output_dir, f'{stem}_Entity_Columns_{timestamp}')
+            saves.append((output_stem, executor.submit(save_outputs, output_stem, formats, extracted_columns, pk_fk_info_columns)))
+
+        for output_stem, future in saves:
+            try:
+                output_files.extend(future.result())
+            except Exception as e:
+                print(f"Error: Could not save '{output_stem}': {e}")
+    return output_files
+
+# Named styles shared by every styled cell of the output workbook (one style record each, not one per cell)
+HEADER_STYLE = 'Extracted Header'
+BOLD_STYLE = 'Extracted Bold'
+FK_STYLE = 'Extracted FK'
+FK_COLOR = 'D9D9D9'  # Light gray for FK
+
+# Legend entries shown from B1 to I1, the FK entry goes to K1
 legend_data = [
     ('D365', convert_to_argb('D9E1F2')),
     ('AXAPTA', convert_to_argb('C6E0B4')),
@@ -181,25 +355,193 @@ legend_data = [
     ('Budget.xlsx', convert_to_argb('D0E0E3'))
 ]
 
-# Set system names and colors from B1 to I1
-for i, (system, color) in enumerate(legend_data, start=2):
-    legend_cell = legend_ws.cell(row=1, column=i, value=system)
-    legend_cell.font = pk_bold_font  # Bold system names
-    legend_cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-
-# Set FK color in K1
-fk_legend_cell = legend_ws.cell(row=1, column=11, value='Foreign Key')
-fk_legend_cell.font = pk_bold_font
-fk_legend_cell.fill = fk_fill
-
-# Save the workbook with PK/FK highlights and the legend
-wb.save(output_file)
-
-# Clear the screen
-os.system('cls' if os.name == 'nt' else 'clear')
+class OutputStyles:
+    """Registers the named styles of the output workbook on first use and hands out their names."""
+
+    def __init__(self, wb):
+        self.wb = wb
+        self.registered = set()
+
+    def get(self, name, **style):
+        if name not in self.registered:
+            self.wb.add_named_style(NamedStyle(name=name, **style))
+            self.registered.add(name)
+        return name
+
+    def header(self):
+        # Same look as the header row pandas' to_excel used to write
+        thin = Side(style='thin')
+        return self.get(HEADER_STYLE, font=Font(bold=True), border=Border(left=thin, right=thin, top=thin, bottom=thin),
+                        alignment=Alignment(horizontal='center', vertical='top'))
+
+    def bold(self):
+        return self.get(BOLD_STYLE, font=Font(bold=True))
+
+    def fk(self):
+        return self.get(FK_STYLE, fill=PatternFill(start_color=FK_COLOR, end_color=FK_COLOR, fill_type="solid"))
+
+    def highlight(self, color):
+        # Bold text on a color fill (PK cells and legend entries), one style per color
+        return self.get(f'Extracted Highlight {color}', font=Font(bold=True),
+                        fill=PatternFill(start_color=color, end_color=color, fill_type="solid"))
+
+def styled_cell(ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+def entity_cell(ws, styles, value, pk_fk):
+    """Cell for one entity column, styled by its PK/FK info."""
+    if pk_fk['type'] == 'PK' and len(pk_fk['color']) == 8:  # Ensure color is valid aRGB hex
+        return styled_cell(ws, value, styles.highlight(pk_fk['color']))
+    if pk_fk['type'] == 'FK':
+        return styled_cell(ws, value, styles.fk())
+    return value
+
+def save_extracted_columns(output_file, extracted_columns, pk_fk_info_columns):
+    """Write the Extracted Columns sheet with PK/FK highlights, hyperlinks and the Legend sheet.
+
+    The workbook is streamed in write-only mode, so every cell is formatted as it
+    is written and the file is serialized once.
+    """
+    wb = Workbook(write_only=True)
+    styles = OutputStyles(wb)
+    ws = wb.create_sheet('Extracted Columns')
+
+    # Header row: one hyperlink per source sheet
+    ws.append([styled_cell(ws, f'=HYPERLINK("#\'{sheet_name}\'!A1", "{sheet_name}")', styles.header())
+               for sheet_name in extracted_columns])
+
+    # One output row per entity column position, shorter sheets are left blank
+    columns = [(entity_columns, pk_fk_info_columns[sheet_name]) for sheet_name, entity_columns in extracted_columns.items()]
+    row_count = max((len(entity_columns) for entity_columns, _ in columns), default=0)
+    for idx in range(row_count):
+        ws.append([entity_cell(ws, styles, entity_columns[idx], pk_fk_info[idx]) if idx < len(entity_columns) else None
+                   for entity_columns, pk_fk_info in columns])
+
+    # Legend sheet laid out horizontally:
+    # A1: 'PK:', B1 to I1: Color-coded systems, J1: 'FK:', K1: Foreign Key color coding
+    legend_ws = wb.create_sheet('Legend')
+    legend_ws.append(
+        [styled_cell(legend_ws, 'PK:', styles.bold())]
+        + [styled_cell(legend_ws, system, styles.highlight(color)) for system, color in legend_data]
+        + [styled_cell(legend_ws, 'FK:', styles.bold()),
+           styled_cell(legend_ws, 'Foreign Key', styles.highlight(FK_COLOR))]
+    )
+
+    wb.save(output_file)
+
+# Columns of the long entity model, one row per (sheet, entity column)
+ENTITY_MODEL_FIELDS = ['sheet', 'position', 'entity_column', 'type', 'custom_identifier', 'description', 'source_system', 'color']
+# Low-cardinality columns that are stored dictionary-encoded
+ENTITY_MODEL_CATEGORIES = ['sheet', 'type', 'source_system', 'color']
+
+def entity_model_table(extracted_columns, pk_fk_info_columns):
+    """Build the long entity model as an Arrow table, without the None padding of the wide Excel layout."""
+    import pyarrow as pa  # Imported here so the Excel output works without pyarrow
+    columns = {field: [] for field in ENTITY_MODEL_FIELDS}
+    for sheet, entity_columns in extracted_columns.items():
+        columns['sheet'].extend([sheet] * len(entity_columns))
+        columns['position'].extend(range(1, len(entity_columns) + 1))
+        # Entity column names can come in as numbers or dates, the model keeps them as text
+        columns['entity_column'].extend(str(entity_column) for entity_column in entity_columns)
+        for pk_fk in pk_fk_info_columns[sheet]:
+            for field in ENTITY_MODEL_FIELDS[3:]:
+                columns[field].append(pk_fk[field])
+
+    arrays = {field: pa.array(values, type=pa.int32() if field == 'position' else pa.string())
+              for field, values in columns.items()}
+    for field in ENTITY_MODEL_CATEGORIES:
+        arrays[field] = arrays[field].dictionary_encode()
+    return pa.table(arrays)
+
+def save_entity_model(output_file, extracted_columns, pk_fk_info_columns):
+    """Write the long entity model to a .parquet file, or to an uncompressed Arrow IPC file that can be memory-mapped."""
+    import pyarrow as pa
+    table = entity_model_table(extracted_columns, pk_fk_info_columns)
+    if output_file.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, output_file)
+    else:
+        with pa.OSFile(output_file, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+# Output formats by file extension
+OUTPUT_WRITERS = {
+    'xlsx': save_extracted_columns,
+    'parquet': save_entity_model,
+    'arrow': save_entity_model
+}
 
-# Display the peanut ASCII art using raw string
-peanut_art = r"""
+def save_outputs(output_stem, formats, extracted_columns, pk_fk_info_columns):
+    """Save the extraction as <output_stem>.<format> for every format and return the files written."""
+    output_files = []
+    rows = sum(len(entity_columns) for entity_columns in extracted_columns.values())
+    for output_format in formats:
+        output_file = f'{output_stem}.{output_format}'
+        with run_report.stage(f'save_{output_format}') as stage:
+            OUTPUT_WRITERS[output_format](output_file, extracted_columns, pk_fk_info_columns)
+            # The xlsx has a header row of sheet links and the legend row, the long model one row per entity column
+            cells = (len(extracted_columns) + rows + len(legend_data) + 3 if output_format == 'xlsx'
+                     else rows * len(ENTITY_MODEL_FIELDS))
+            stage.count(rows=rows, sheets=len(extracted_columns), cells=cells)
+        output_files.append(output_file)
+    return output_files
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract entity columns and PK/FK info from Source Matrix workbooks.')
+    parser.add_argument('sources', nargs='*',
+                        help='Source Matrix workbooks or directories of them, processed in batch on a process pool '
+                             '(default: the single source file below)')
+    parser.add_argument('--output-dir', default='.', help='directory for the batch output files (default: current directory)')
+    parser.add_argument('--workers', type=int, help='processes in batch mode (default: one per CPU)')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='sheets per batch task')
+    parser.add_argument('--format', nargs='+', choices=list(OUTPUT_WRITERS), default=['xlsx'],
+                        help='output formats: the formatted xlsx and/or the long entity model as parquet or arrow (IPC file)')
+    parser.add_argument('--no-cache', action='store_true', help="parse every sheet, don't read or write the sheet cache")
+    parser.add_argument('--report', metavar='FILE', help='time every stage and write a JSON run report to FILE')
+    parser.add_argument('--trace-memory', action='store_true', help='add the tracemalloc peak per stage to --report (slower)')
+    args = parser.parse_args()
+
+    if args.report:
+        run_report.start(os.path.basename(__file__), args.trace_memory)
+    try:
+        run(args)
+    finally:
+        run_report.finish(args.report)
+
+def run(args):
+    """Extract the hardcoded source file, or the workbooks given on the command line in batch."""
+
+    # Path to the source Excel file (use raw string)
+    source_file = r'c:\\python\\DWH_Source_Matrix (2).xlsx'
+
+    # Get the current timestamp in the format YYYYMMDD_HHMMSS
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if args.sources:
+        output_files = extract_batch(find_workbooks(args.sources), args.output_dir, timestamp,
+                                     args.workers, args.shard_size, not args.no_cache, args.format)
+        print(f"Entity column names were saved to: {', '.join(output_files)}")
+        return
+
+    # Define the output file path with the timestamp appended to the file name (use raw string)
+    output_stem = rf'c:\\python\\DWH_Entity_Columns_Output_{timestamp}'
+
+    # Sheets that did not change since the last run are taken from the per-user sheet cache
+    cache = None if args.no_cache else SheetCache(default_cache_file(source_file), {'entity': ENTITY_CACHE_VERSION})
+    try:
+        extracted_columns, pk_fk_info_columns = extract_source_matrix(source_file, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    output_files = save_outputs(output_stem, args.format, extracted_columns, pk_fk_info_columns)
+
+    # Clear the screen
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+    # Display the peanut ASCII art using raw string
+    peanut_art = r"""
   ,-~~-.___.
  / |  '     \         It was a dark and stormy night....
 (  )         0              
@@ -210,6 +552,11 @@ peanut_art = r"""
 =(  _____| (_________|   <3
 """
 
-print(peanut_art)
+    print(peanut_art)
+
+    print(f"Entity column names with PK/FK highlights and hyperlinks were saved to: {', '.join(output_files)}")
+    if cache is not None:
+        print(cache.report())
 
-print(f"Entity column names with PK/FK highlights and hyperlinks were saved to: {output_file}")
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
+import argparse
+import importlib
 import pandas as pd
 import openpyxl
-from openpyxl.styles import Font, Border, Side, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side, Alignment, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import RowDimension
+from openpyxl.worksheet.hyperlink import Hyperlink
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import os
+import run_report
+from source_matrix_cache import SheetCache, MISSING, cache_version, default_cache_file, find_workbooks, output_stems
 
 def load_excel_data(input_file, sheet_name):
     """Load Excel file and return data as DataFrame"""
@@ -15,7 +24,7 @@ def load_excel_data(input_file, sheet_name):
         print(f"Error: File '{input_file}' not found.")
         return None, None
     except ValueError as e:
-        print(f"Error: {e}")
+        print(f"Error: '{input_file}': {e}")
         return None, None
 
 def find_headers(object_list_df):
@@ -34,136 +43,352 @@ def read_data_tables(xls, dwh_header_row, data_mart_header_row):
     table2_df = pd.read_excel(xls, sheet_name='object list', header=data_mart_header_row).dropna(how='all')
     return table1_df, table2_df
 
-def fetch_description_from_sheet(wb, sheet_name):
-    """Fetch the description from Cell B5 of the given worksheet."""
+# Version of the cached 'b5' descriptions: bump the number when read_sheet_descriptions changes
+B5_CACHE_VERSION = cache_version(1)
+
+def read_sheet_descriptions(input_file, cache=None, titles=None):
+    """Read cell B5 of every sheet without loading the rest of the workbook.
+
+    With a SheetCache, only the sheets whose content changed since the last run are read;
+    with titles, only those sheets are.
+    """
+    if cache is not None:
+        descriptions = {sheet: cache.get(sheet, 'b5') for sheet in cache.open(input_file)}
+        changed = {sheet for sheet, description in descriptions.items() if description is MISSING}
+    else:
+        descriptions, changed = {}, titles
+    if changed == set():
+        return descriptions
+
+    wb = openpyxl.load_workbook(input_file, read_only=True)
     try:
-        sheet = wb[sheet_name]
-        description = sheet["B5"].value  # Fetching the value from cell B5
-        if description:
-            return description
-        else:
-            return None
-    except KeyError:
+        for ws in wb.worksheets:
+            if changed is not None and ws.title not in changed:
+                continue
+            descriptions[ws.title] = None
+            # Read-only sheets are parsed as a stream, so asking for row 5 only stops right after it
+            for row in ws.iter_rows(min_row=5, max_row=5, min_col=2, max_col=2, values_only=True):
+                descriptions[ws.title] = row[0] if row else None
+            if cache is not None:
+                cache.put(ws.title, 'b5', descriptions[ws.title])
+        return descriptions
+    finally:
+        wb.close()
+
+def fetch_description_from_sheet(descriptions, sheet_name):
+    """Fetch the description from Cell B5 of the given worksheet."""
+    description = descriptions.get(sheet_name)  # Value of cell B5, read by read_sheet_descriptions
+    if description:
+        return description
+    else:
         return None
 
-def process_new_objects(sheet_names, existing_dwh_objects, existing_dm_objects, wb):
+def process_new_objects(sheet_names, existing_dwh_objects, existing_dm_objects, descriptions):
     """Find new objects in sheet names that are not already in the object list."""
+    # Sets, so every sheet is looked up in constant time instead of scanning the lists
+    existing_dwh_objects, existing_dm_objects = set(existing_dwh_objects), set(existing_dm_objects)
     new_dwh_objects, new_dm_objects = [], []
     for sheet_name in sheet_names:
         cleaned_sheet_name = sheet_name.strip().lower()
-        description = fetch_description_from_sheet(wb, sheet_name)  # Fetch description from B5
+        description = fetch_description_from_sheet(descriptions, sheet_name)  # Fetch description from B5
         if cleaned_sheet_name.startswith('dwh.') and sheet_name not in existing_dwh_objects:
             new_dwh_objects.append([None, sheet_name, description if description else 'New description', '', ''])
         elif cleaned_sheet_name.startswith('dm.') and sheet_name not in existing_dm_objects:
             new_dm_objects.append([None, sheet_name, description if description else 'New description', ''])
     return new_dwh_objects, new_dm_objects
 
-def create_and_format_workbook(output_file, updated_table1_df, updated_table2_df):
-    """Create new workbook and write data with formatting."""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = 'object list'
+DWH_HEADERS = ['Dwh object number', 'Dwh object name', 'Dwh object description', 'Reports Tag', 'checked']
+DM_HEADERS = ['Data mart object number', 'Data mart object name', 'Data mart object description', 'Reports Tag']
+
+# Schemas covered by the object list (the 'dwh.' and 'dm.' prefixes of the sheet names)
+RECONCILED_SCHEMAS = ('dwh', 'dm')
+RECONCILIATION_FIELDS = ['Object name', 'Status', 'In object list', 'Has sheet', 'In database', 'Object type']
+# Statuses in report order: problems first
+DOCUMENTED_MISSING = 'documented, missing in database'
+UNDOCUMENTED = 'in database, undocumented'
+MATCHING = 'matching'
+
+def object_key(name):
+    """Join key of an object name: 'DWH.Customer ' and 'dwh.customer' are the same object."""
+    return name.strip().lower()
+
+def fetch_catalog(env_name, sqlite_dir=None):
+    """Fetch the schema-qualified tables and views of one environment through ConnectDb-TakeTableVw.py.
+
+    With sqlite_dir, <sqlite_dir>/<ENV>.db is used as a local stand-in for the server.
+    """
+    catalog = importlib.import_module('ConnectDb-TakeTableVw')  # The script name is not a valid module name
+    if sqlite_dir:
+        env_details, connect = catalog.sqlite_environments(sqlite_dir, [env_name]), catalog.connect_sqlite
+    else:
+        env_details, connect = {env_name: catalog.environments[env_name]}, catalog.connect_odbc
+    with catalog.ConnectionPool(env_details, connect) as pool:
+        return catalog.fetch_data(env_name, pool, catalog.qualified_objects_query)
+
+def reconcile_objects(listed_objects, sheet_names, catalog_df):
+    """Hash-join the object list, the sheet names and the database catalog on the object name.
+
+    One pass over each source builds a dictionary keyed by object_key; objects in
+    the object list or with a sheet count as documented. Returns records with the
+    RECONCILIATION_FIELDS keys, grouped by status (missing, undocumented, matching).
+    """
+    objects = {}
+
+    def entry(name):
+        key = object_key(name)
+        if key not in objects:
+            objects[key] = dict.fromkeys(RECONCILIATION_FIELDS[2:5], False)
+            objects[key].update({'Object name': name.strip(), 'Object type': None})
+        return objects[key]
+
+    for name in listed_objects:
+        if isinstance(name, str):  # Skip the blank cells of the object list tables
+            entry(name)['In object list'] = True
+    for name in sheet_names:
+        if object_key(name).startswith(tuple(f'{schema}.' for schema in RECONCILED_SCHEMAS)):
+            entry(name)['Has sheet'] = True
+    for object_type, schema, name in zip(catalog_df['Object_Type'], catalog_df['Object_Schema'], catalog_df['Object_Name']):
+        if schema.lower() in RECONCILED_SCHEMAS:
+            record = entry(f'{schema}.{name}')
+            record['In database'] = True
+            record['Object type'] = object_type
+
+    groups = {DOCUMENTED_MISSING: [], UNDOCUMENTED: [], MATCHING: []}
+    for record in objects.values():
+        documented = record['In object list'] or record['Has sheet']
+        record['Status'] = MATCHING if documented and record['In database'] else DOCUMENTED_MISSING if documented else UNDOCUMENTED
+        groups[record['Status']].append(record)
+    return [record for records in groups.values() for record in records]
+
+def reconcile_workbook(input_file, catalog_df, output_file):
+    """Reconcile one Source Matrix against a fetched catalog and save the result. Returns the count per status."""
+    object_list_df, xls = load_excel_data(input_file, 'object list')
+    if object_list_df is None or xls is None:
+        return None
+    dwh_header_row, data_mart_header_row = find_headers(object_list_df)
+    if dwh_header_row is None or data_mart_header_row is None:
+        return None
+    table1_df, table2_df = read_data_tables(xls, dwh_header_row, data_mart_header_row)
+    listed_objects = table1_df['Dwh object name'].tolist() + table2_df['Data mart object name'].tolist()
+
+    with run_report.stage('reconcile_objects') as stage:
+        records = reconcile_objects(listed_objects, xls.sheet_names, catalog_df)
+        stage.count(rows=len(listed_objects) + len(catalog_df), sheets=len(xls.sheet_names))
+    pd.DataFrame(records, columns=RECONCILIATION_FIELDS).to_excel(output_file, index=False, sheet_name='Reconciliation')
+
+    counts = {status: 0 for status in (DOCUMENTED_MISSING, UNDOCUMENTED, MATCHING)}
+    for record in records:
+        counts[record['Status']] += 1
+    print(f"{os.path.basename(input_file)}: " + ', '.join(f'{count} {status}' for status, count in counts.items())
+          + f", written to {output_file}")
+    return counts
 
+def add_object_list_styles(wb):
+    """Register the named styles shared by all cells of the 'object list' sheet."""
     thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    bold_font = Font(bold=True)
-    hyperlink_font = Font(underline='single', color='0000FF')
-
-    # Write Data Warehouse headers and format
-    dwh_headers = ['Dwh object number', 'Dwh object name', 'Dwh object description', 'Reports Tag', 'checked']
-    for col_idx, header in enumerate(dwh_headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.font = Font(bold=True, size=12)  # Bold and font size +2
-        cell.border = thin_border
-
-    # Write Data Warehouse objects
-    for r_idx, row in enumerate(updated_table1_df.itertuples(index=False), 2):
+    centered = Alignment(horizontal='center', vertical='center')
+    wrapped = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    styles = {
+        'header': NamedStyle(name='Object Header', font=Font(bold=True, size=12), border=thin_border),  # Bold and font size +2
+        'cell': NamedStyle(name='Object Cell', border=thin_border, font=DEFAULT_FONT),
+        'number': NamedStyle(name='Object Number', border=thin_border, alignment=centered, font=DEFAULT_FONT),
+        'link': NamedStyle(name='Object Link', border=thin_border, alignment=centered, font=Font(underline='single', color='0000FF')),
+        'description': NamedStyle(name='Object Description', border=thin_border, alignment=wrapped, font=DEFAULT_FONT),
+        'bold_description': NamedStyle(name='Object Description Bold', border=thin_border, alignment=wrapped, font=Font(bold=True)),
+    }
+    for style in styles.values():
+        wb.add_named_style(style)
+    return {key: style.name for key, style in styles.items()}
+
+def object_list_cell(ws, value, style, link_location=None):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    if link_location:
+        # Internal location link: no external relationship is stored per link
+        cell.hyperlink = Hyperlink(ref='', location=link_location)
+    return cell
+
+def write_object_rows(ws, styles, headers, df, header_row):
+    """Append a header row and one formatted row per object, starting at header_row."""
+    ws.append([object_list_cell(ws, header, styles['header']) for header in headers])
+
+    # One shared 45pt row dimension for every object row instead of a new one per row
+    object_row_height = RowDimension(ws, ht=45)
+    for r_idx, row in enumerate(df.itertuples(index=False), header_row + 1):
+        ws.row_dimensions[r_idx] = object_row_height  # Must be set before the row is streamed
+        cells = []
         for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = thin_border
             # Alignments and hyperlinking
             if c_idx == 1:
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            if c_idx == 2:
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.font = hyperlink_font
-                cell.hyperlink = f"#{row[1]}!A1"  # Correct format for internal link
-            if c_idx == 3:
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                if row[2] != 'New description':  # Apply bold only if it's not the default 'New description'
-                    cell.font = bold_font
-                ws.row_dimensions[r_idx].height = 45
-
-    # Write Data Mart headers and objects
-    dm_start_row = len(updated_table1_df) + 3
-    dm_headers = ['Data mart object number', 'Data mart object name', 'Data mart object description', 'Reports Tag']
-    for col_idx, header in enumerate(dm_headers, 1):
-        cell = ws.cell(row=dm_start_row - 1, column=col_idx, value=header)
-        cell.font = Font(bold=True, size=12)  # Bold and font size +2
-        cell.border = thin_border
-
-    for r_idx, row in enumerate(updated_table2_df.itertuples(index=False), dm_start_row):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = thin_border
-            if c_idx == 1:
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            if c_idx == 2:
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.font = hyperlink_font
-                cell.hyperlink = f"#{row[1]}!A1"  # Correct format for internal link
-            if c_idx == 3:
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                if row[2] != 'New description':  # Apply bold only if it's not the default 'New description'
-                    cell.font = bold_font
-                ws.row_dimensions[r_idx].height = 45
-
-    # Adjust column widths
+                cells.append(object_list_cell(ws, value, styles['number']))
+            elif c_idx == 2:
+                cells.append(object_list_cell(ws, value, styles['link'], link_location=f"{row[1]}!A1"))  # Jump to A1 of the object's sheet
+            elif c_idx == 3:
+                # Apply bold only if it's not the default 'New description'
+                cells.append(object_list_cell(ws, value, styles['bold_description'] if row[2] != 'New description' else styles['description']))
+            else:
+                cells.append(object_list_cell(ws, value, styles['cell']))
+        ws.append(cells)
+
+def create_and_format_workbook(output_file, updated_table1_df, updated_table2_df):
+    """Create new workbook and write data with formatting.
+
+    The sheet is streamed in write-only mode: rows are formatted with shared named
+    styles as they are appended and never held in memory as a full workbook.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('object list')
+    styles = add_object_list_styles(wb)
+
+    # Adjust column widths (write-only sheets need them before the first row)
     ws.column_dimensions['B'].width = 20
     ws.column_dimensions['C'].width = 160  # 8x width of column B
     ws.column_dimensions['A'].width = 15
 
+    # Write Data Warehouse headers and objects, Data Mart headers and objects follow right below
+    write_object_rows(ws, styles, DWH_HEADERS, updated_table1_df, 1)
+    write_object_rows(ws, styles, DM_HEADERS, updated_table2_df, len(updated_table1_df) + 2)
+
     # Save the new workbook
     wb.save(output_file)
-    print(f"New version of Excel file created and saved to {output_file}")
 
-def main():
-    input_file = r"C:\Users\pttom\OneDrive\Pulpit\DWH_Source_Matrix (2).xlsx"
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_file = rf"C:\Users\pttom\OneDrive\Pulpit\Object_List_Only_{timestamp}.xlsx"
+def build_updated_tables(table1_df, table2_df, new_dwh_objects, new_dm_objects):
+    """Add the new objects to the DWH and Data Mart tables, sort them by name and renumber them."""
+    # Convert new objects to DataFrames and concatenate
+    new_dwh_df = pd.DataFrame(new_dwh_objects, columns=DWH_HEADERS)
+    new_dm_df = pd.DataFrame(new_dm_objects, columns=DM_HEADERS)
+    updated_table1_df = pd.concat([table1_df, new_dwh_df], ignore_index=True).sort_values(by='Dwh object name').reset_index(drop=True)
+    updated_table2_df = pd.concat([table2_df, new_dm_df], ignore_index=True).sort_values(by='Data mart object name').reset_index(drop=True)
 
+    # Renumber the objects
+    updated_table1_df['Dwh object number'] = updated_table1_df.index + 1
+    updated_table2_df['Data mart object number'] = updated_table2_df.index + 1
+    return updated_table1_df, updated_table2_df
+
+def update_object_list(input_file, output_file, use_cache=True):
+    """Add the new sheets of one Source Matrix to its object list and save the result to output_file."""
     # Load data and sheet names
-    object_list_df, xls = load_excel_data(input_file, 'object list')
-    if object_list_df is None or xls is None:
-        return  # Exit if error in loading
+    with run_report.stage('load_excel_data') as stage:
+        object_list_df, xls = load_excel_data(input_file, 'object list')
+        if object_list_df is None or xls is None:
+            return False  # Exit if error in loading
+        stage.count(rows=len(object_list_df), sheets=len(xls.sheet_names))
 
-    # Load the workbook to access other sheets
-    wb = openpyxl.load_workbook(input_file)
+    # Read only the B5 descriptions of the other sheets, not the whole workbook,
+    # and only for the sheets that changed since the last run
+    with run_report.stage('read_sheet_descriptions') as stage:
+        if use_cache:
+            with SheetCache(default_cache_file(input_file), {'b5': B5_CACHE_VERSION}) as cache:
+                descriptions = read_sheet_descriptions(input_file, cache)
+            print(f"{os.path.basename(input_file)}: {cache.report()}")
+        else:
+            descriptions = read_sheet_descriptions(input_file)
+        stage.count(sheets=len(descriptions))
 
     # Find headers for DWH and Data Mart sections
     dwh_header_row, data_mart_header_row = find_headers(object_list_df)
     if dwh_header_row is None or data_mart_header_row is None:
-        return  # Exit if error in finding headers
+        print(f"Error: Object list of '{input_file}' not updated.")
+        return False  # Exit if error in finding headers
 
     # Read tables and existing objects
-    table1_df, table2_df = read_data_tables(xls, dwh_header_row, data_mart_header_row)
+    with run_report.stage('read_data_tables') as stage:
+        table1_df, table2_df = read_data_tables(xls, dwh_header_row, data_mart_header_row)
+        stage.count(rows=len(table1_df) + len(table2_df))
     existing_dwh_objects = table1_df['Dwh object name'].tolist()
     existing_dm_objects = table2_df['Data mart object name'].tolist()
 
     # Find new objects
-    new_dwh_objects, new_dm_objects = process_new_objects(xls.sheet_names, existing_dwh_objects, existing_dm_objects, wb)
-
-    # Convert new objects to DataFrames and concatenate
-    new_dwh_df = pd.DataFrame(new_dwh_objects, columns=['Dwh object number', 'Dwh object name', 'Dwh object description', 'Reports Tag', 'checked'])
-    new_dm_df = pd.DataFrame(new_dm_objects, columns=['Data mart object number', 'Data mart object name', 'Data mart object description', 'Reports Tag'])
-    updated_table1_df = pd.concat([table1_df, new_dwh_df], ignore_index=True).sort_values(by='Dwh object name').reset_index(drop=True)
-    updated_table2_df = pd.concat([table2_df, new_dm_df], ignore_index=True).sort_values(by='Data mart object name').reset_index(drop=True)
+    with run_report.stage('process_new_objects') as stage:
+        new_dwh_objects, new_dm_objects = process_new_objects(xls.sheet_names, existing_dwh_objects, existing_dm_objects, descriptions)
+        stage.count(rows=len(new_dwh_objects) + len(new_dm_objects), sheets=len(xls.sheet_names))
 
-    # Renumber the objects
-    updated_table1_df['Dwh object number'] = updated_table1_df.index + 1
-    updated_table2_df['Data mart object number'] = updated_table2_df.index + 1
+    updated_table1_df, updated_table2_df = build_updated_tables(table1_df, table2_df, new_dwh_objects, new_dm_objects)
 
     # Create and save new Excel file
-    create_and_format_workbook(output_file, updated_table1_df, updated_table2_df)
+    with run_report.stage('create_and_format_workbook') as stage:
+        create_and_format_workbook(output_file, updated_table1_df, updated_table2_df)
+        stage.count(rows=len(updated_table1_df) + len(updated_table2_df), sheets=1,
+                    cells=(len(updated_table1_df) + 1) * len(DWH_HEADERS) + (len(updated_table2_df) + 1) * len(DM_HEADERS))
+    print(f"New version of Excel file created and saved to {output_file}")
+    return True
+
+def update_batch(input_files, output_dir, timestamp, workers=None, use_cache=True):
+    """Update the object lists of many Source Matrix workbooks on a process pool, one workbook per task."""
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = [os.path.join(output_dir, f'{stem}_Object_List_Only_{timestamp}.xlsx') for stem in output_stems(input_files)]
+    # Stages run in the worker processes are not part of the run report, the batch as a whole is
+    with run_report.stage('update_batch') as stage, ProcessPoolExecutor(max_workers=workers) as executor:
+        stage.count(sheets=len(input_files))
+        futures = [executor.submit(update_object_list, input_file, output_file, use_cache)
+                   for input_file, output_file in zip(input_files, output_files)]
+        done = []
+        # Results are collected in input order, so the messages and the returned list don't depend on timing
+        for input_file, output_file, future in zip(input_files, output_files, futures):
+            try:
+                if future.result():
+                    done.append(output_file)
+            except Exception as e:
+                print(f"Error: Could not update '{input_file}': {e}")
+    return done
+
+def main():
+    parser = argparse.ArgumentParser(description='Add the new sheets of Source Matrix workbooks to their object list.')
+    parser.add_argument('sources', nargs='*',
+                        help='Source Matrix workbooks or directories of them, processed in batch on a process pool '
+                             '(default: the single input file below)')
+    parser.add_argument('--output-dir', default='.', help='directory for the batch output files (default: current directory)')
+    parser.add_argument('--workers', type=int, help='processes in batch mode (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true', help="read every B5 description, don't use the sheet cache")
+    parser.add_argument('--reconcile', metavar='ENV',
+                        help='instead of updating, reconcile the object list and sheets with the tables and views of ENV')
+    parser.add_argument('--sqlite', metavar='DIR', help='with --reconcile: read the catalog from the SQLite stand-in DIR/<ENV>.db')
+    parser.add_argument('--report', metavar='FILE', help='time every stage and write a JSON run report to FILE')
+    parser.add_argument('--trace-memory', action='store_true', help='add the tracemalloc peak per stage to --report (slower)')
+    args = parser.parse_args()
+
+    if args.report:
+        run_report.start(os.path.basename(__file__), args.trace_memory)
+    try:
+        run(args)
+    finally:
+        run_report.finish(args.report)
+
+def run(args):
+    """Update (or reconcile) the hardcoded workbook, or the workbooks given on the command line."""
+    input_file = r"C:\Users\pttom\OneDrive\Pulpit\DWH_Source_Matrix (2).xlsx"
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if args.reconcile:
+        reconcile(args, input_file, timestamp)
+        return
+
+    if args.sources:
+        output_files = update_batch(find_workbooks(args.sources), args.output_dir, timestamp, args.workers, not args.no_cache)
+        print(f"Updated object lists of {len(output_files)} workbooks")
+        return
+
+    output_file = rf"C:\Users\pttom\OneDrive\Pulpit\Object_List_Only_{timestamp}.xlsx"
+    update_object_list(input_file, output_file, not args.no_cache)
+
+def reconcile(args, input_file, timestamp):
+    """Reconciliation mode: fetch the catalog of one environment once and reconcile every workbook against it."""
+    try:
+        with run_report.stage(f'fetch_catalog {args.reconcile}') as stage:
+            catalog_df = fetch_catalog(args.reconcile, args.sqlite)
+            stage.count(rows=len(catalog_df))
+    except Exception as e:
+        print(f"Error: Could not fetch the catalog of {args.reconcile}: {e}")
+        return
+
+    if args.sources:
+        os.makedirs(args.output_dir, exist_ok=True)
+        sources = find_workbooks(args.sources)
+        for source, stem in zip(sources, output_stems(sources)):
+            output_file = os.path.join(args.output_dir, f'{stem}_Reconciliation_{args.reconcile}_{timestamp}.xlsx')
+            reconcile_workbook(source, catalog_df, output_file)
+    else:
+        reconcile_workbook(input_file, catalog_df, rf"C:\Users\pttom\OneDrive\Pulpit\Object_List_Reconciliation_{args.reconcile}_{timestamp}.xlsx")
 
 if __name__ == "__main__":
     main()
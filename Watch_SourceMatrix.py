@@ -0,0 +1,196 @@
+# ------------------------------------------------------------------------------
+# Watch mode for the Source Matrix: keeps the parsed workbook in memory, polls
+# the file for saves and, after each save, re-parses only the sheets whose
+# content changed (same per-sheet hashes as the sheet cache). The Extracted
+# Columns + Legend workbook and the object list workbook are rewritten only
+# when their content actually changed.
+#
+#   python Watch_SourceMatrix.py "DWH_Source_Matrix (2).xlsx" --output-dir out
+# ------------------------------------------------------------------------------
+
+import argparse
+import importlib
+import os
+import time
+from datetime import datetime
+
+from source_matrix_cache import SheetCache, default_cache_file, sheet_hashes
+
+# The script names are not valid module names, so they are imported by file name
+extractor = importlib.import_module('Extract_Tables&Columns_SourceMatrix')
+object_list = importlib.import_module('Object_List_Update_SourceMatrix')
+
+OBJECT_LIST_SHEET = 'object list'
+POLL_INTERVAL = 2.0  # Seconds between two looks at the file
+SETTLE_TIME = 1.0    # The file must keep the same size and time this long before it is read (Excel saves in steps)
+
+def read_object_list_tables(source_file):
+    """DWH and Data Mart tables of the 'object list' sheet, or None if the sheet can't be read."""
+    object_list_df, xls = object_list.load_excel_data(source_file, OBJECT_LIST_SHEET)
+    if object_list_df is None or xls is None:
+        return None
+    dwh_header_row, data_mart_header_row = object_list.find_headers(object_list_df)
+    if dwh_header_row is None or data_mart_header_row is None:
+        return None
+    return object_list.read_data_tables(xls, dwh_header_row, data_mart_header_row)
+
+class SourceMatrixModel:
+    """The parsed Source Matrix held in memory: per-sheet hashes, entity columns, B5 descriptions and the object list."""
+
+    def __init__(self, source_file):
+        self.source_file = source_file
+        self.hashes = {}
+        self.entries = {}       # Sheet -> (entity columns, PK/FK info), None for sheets without entity columns
+        self.descriptions = {}  # Sheet -> B5 value
+        self.tables = None      # (DWH table, Data Mart table) of the 'object list' sheet
+
+    def load(self, cache=None):
+        """Parse the whole workbook, taking unchanged sheets from the on-disk sheet cache if one is given."""
+        extracted_columns, pk_fk_info_columns = extractor.extract_source_matrix(self.source_file, cache)
+        self.descriptions = object_list.read_sheet_descriptions(self.source_file, cache)
+        self.hashes = dict(cache.hashes) if cache is not None else sheet_hashes(self.source_file)
+        self.entries = {sheet: (extracted_columns[sheet], pk_fk_info_columns[sheet]) if sheet in extracted_columns else None
+                        for sheet in self.hashes}
+        self.tables = read_object_list_tables(self.source_file)
+
+    def refresh(self):
+        """Re-parse the sheets changed since the last look. Returns (changed, deleted) sheet lists."""
+        hashes = sheet_hashes(self.source_file)
+        changed = [sheet for sheet, digest in hashes.items() if self.hashes.get(sheet) != digest]
+        deleted = [sheet for sheet in self.hashes if sheet not in hashes]
+
+        if changed:
+            extracted_columns, pk_fk_info_columns = extractor.extract_sheets(self.source_file, set(changed))
+            descriptions = object_list.read_sheet_descriptions(self.source_file, titles=set(changed))
+            for sheet in changed:
+                self.entries[sheet] = (extracted_columns[sheet], pk_fk_info_columns[sheet]) if sheet in extracted_columns else None
+                self.descriptions[sheet] = descriptions.get(sheet)
+            if OBJECT_LIST_SHEET in changed:
+                self.tables = read_object_list_tables(self.source_file)
+        for sheet in deleted:
+            del self.entries[sheet], self.descriptions[sheet]
+
+        # Keep the workbook's sheet order (sheets may also have been moved)
+        self.entries = {sheet: self.entries[sheet] for sheet in hashes}
+        self.hashes = hashes
+        return changed, deleted
+
+    def extraction(self):
+        """(extracted_columns, pk_fk_info_columns) in workbook order, as extract_source_matrix returns them."""
+        extracted_columns, pk_fk_info_columns = {}, {}
+        for sheet, entry in self.entries.items():
+            if entry is not None:
+                extracted_columns[sheet], pk_fk_info_columns[sheet] = entry
+        return extracted_columns, pk_fk_info_columns
+
+    def updated_object_list(self):
+        """The object list tables with the new sheets added, or None without a readable 'object list' sheet."""
+        if self.tables is None:
+            return None
+        table1_df, table2_df = self.tables
+        new_dwh_objects, new_dm_objects = object_list.process_new_objects(
+            list(self.hashes), table1_df['Dwh object name'].tolist(), table2_df['Data mart object name'].tolist(), self.descriptions)
+        return object_list.build_updated_tables(table1_df, table2_df, new_dwh_objects, new_dm_objects)
+
+class OutputWriter:
+    """Writes the outputs of a model, skipping the ones whose content is the same as last written."""
+
+    def __init__(self, output_dir, stem, formats):
+        self.extracted_stem = os.path.join(output_dir, f'{stem}_Entity_Columns')
+        self.object_list_file = os.path.join(output_dir, f'{stem}_Object_List_Only.xlsx')
+        self.formats = formats
+        self.last_extraction = None
+        self.last_object_list = None
+
+    def write(self, model):
+        """Rewrite the outputs that changed and return their descriptions."""
+        written = []
+        extraction = model.extraction()
+        if extraction != self.last_extraction:
+            # Written under a temporary name and moved into place, so nobody opens a half-written file
+            partial_stem = f'{self.extracted_stem}.partial'
+            for partial_file in extractor.save_outputs(partial_stem, self.formats, *extraction):
+                os.replace(partial_file, self.extracted_stem + partial_file[len(partial_stem):])
+            self.last_extraction = extraction
+            written.append('Extracted Columns')
+
+        tables = model.updated_object_list()
+        if tables is not None and (self.last_object_list is None
+                                   or not all(new.equals(old) for new, old in zip(tables, self.last_object_list))):
+            partial_file = f'{self.object_list_file}.partial.xlsx'
+            object_list.create_and_format_workbook(partial_file, *tables)
+            os.replace(partial_file, self.object_list_file)
+            self.last_object_list = tables
+            written.append('object list')
+        return written
+
+def file_state(path):
+    """Size and modification time of the file, or None while it doesn't exist (Excel replaces it on save)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def watch(source_file, output_dir, formats=('xlsx',), use_cache=True, interval=POLL_INTERVAL):
+    """Load the workbook, write the outputs, then keep them up to date after every save until interrupted."""
+    os.makedirs(output_dir, exist_ok=True)
+    model = SourceMatrixModel(source_file)
+    writer = OutputWriter(output_dir, os.path.splitext(os.path.basename(source_file))[0], formats)
+
+    start = time.perf_counter()
+    state = file_state(source_file)
+    if use_cache:
+        versions = {'entity': extractor.ENTITY_CACHE_VERSION, 'b5': object_list.B5_CACHE_VERSION}
+        with SheetCache(default_cache_file(source_file), versions) as cache:
+            model.load(cache)
+        print(cache.report())
+    else:
+        model.load()
+    written = writer.write(model)
+    print(f"Loaded {len(model.hashes)} sheets and wrote {', '.join(written) or 'nothing'} "
+          f"in {time.perf_counter() - start:.1f} s, watching {source_file} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = file_state(source_file)
+            if current is None or current == state:
+                continue
+            time.sleep(SETTLE_TIME)
+            if file_state(source_file) != current:
+                continue  # Still being written, look again on the next round
+
+            start = time.perf_counter()
+            try:
+                changed, deleted = model.refresh()
+                written = writer.write(model)
+            except Exception as e:
+                # Half-saved or locked file (bad zip, truncated XML, ...): keep the old state so the next round tries again
+                print(f"Error: Could not read {source_file}: {type(e).__name__}: {e}")
+                continue
+            state = current
+
+            parts = [f"{len(changed)} changed" + (f" ({', '.join(changed[:5])}{', ...' if len(changed) > 5 else ''})" if changed else '')]
+            if deleted:
+                parts.append(f"{len(deleted)} deleted ({', '.join(deleted[:5])}{', ...' if len(deleted) > 5 else ''})")
+            print(f"{datetime.now():%H:%M:%S} {', '.join(parts)}; rewrote {', '.join(written) or 'nothing'} "
+                  f"in {time.perf_counter() - start:.1f} s")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the Extracted Columns and object list outputs of a Source Matrix up to date while it is edited.')
+    parser.add_argument('source', help='Source Matrix workbook to watch')
+    parser.add_argument('--output-dir', help='directory for the outputs (default: next to the workbook)')
+    parser.add_argument('--format', nargs='+', choices=list(extractor.OUTPUT_WRITERS), default=['xlsx'],
+                        help='formats of the extracted columns output (default xlsx)')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='seconds between two looks at the file')
+    parser.add_argument('--no-cache', action='store_true', help="parse every sheet on start, don't use the sheet cache")
+    args = parser.parse_args()
+
+    watch(args.source, args.output_dir or os.path.dirname(os.path.abspath(args.source)), args.format,
+          not args.no_cache, args.interval)
+
+if __name__ == "__main__":
+    main()
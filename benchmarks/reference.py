@@ -0,0 +1,75 @@
+# ------------------------------------------------------------------------------
+# Earlier implementations kept as baselines for run_benchmarks.py, so the gain
+# of a rewrite stays measurable on every box instead of living in a commit
+# message. They are not used by the scripts.
+# ------------------------------------------------------------------------------
+
+import openpyxl
+from openpyxl.styles import Font, Border, Side, Alignment
+
+def create_and_format_workbook(output_file, updated_table1_df, updated_table2_df):
+    """Object list writer before the write-only rewrite: a full in-memory workbook, styles created per cell."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'object list'
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    bold_font = Font(bold=True)
+    hyperlink_font = Font(underline='single', color='0000FF')
+
+    # Write Data Warehouse headers and format
+    dwh_headers = ['Dwh object number', 'Dwh object name', 'Dwh object description', 'Reports Tag', 'checked']
+    for col_idx, header in enumerate(dwh_headers, 1):
+        cell = ws.cell(row=1, column=col_idx, value=header)
+        cell.font = Font(bold=True, size=12)  # Bold and font size +2
+        cell.border = thin_border
+
+    # Write Data Warehouse objects
+    for r_idx, row in enumerate(updated_table1_df.itertuples(index=False), 2):
+        for c_idx, value in enumerate(row, 1):
+            cell = ws.cell(row=r_idx, column=c_idx, value=value)
+            cell.border = thin_border
+            # Alignments and hyperlinking
+            if c_idx == 1:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+            if c_idx == 2:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+                cell.font = hyperlink_font
+                cell.hyperlink = f"#{row[1]}!A1"  # Correct format for internal link
+            if c_idx == 3:
+                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+                if row[2] != 'New description':  # Apply bold only if it's not the default 'New description'
+                    cell.font = bold_font
+                ws.row_dimensions[r_idx].height = 45
+
+    # Write Data Mart headers and objects
+    dm_start_row = len(updated_table1_df) + 3
+    dm_headers = ['Data mart object number', 'Data mart object name', 'Data mart object description', 'Reports Tag']
+    for col_idx, header in enumerate(dm_headers, 1):
+        cell = ws.cell(row=dm_start_row - 1, column=col_idx, value=header)
+        cell.font = Font(bold=True, size=12)  # Bold and font size +2
+        cell.border = thin_border
+
+    for r_idx, row in enumerate(updated_table2_df.itertuples(index=False), dm_start_row):
+        for c_idx, value in enumerate(row, 1):
+            cell = ws.cell(row=r_idx, column=c_idx, value=value)
+            cell.border = thin_border
+            if c_idx == 1:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+            if c_idx == 2:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+                cell.font = hyperlink_font
+                cell.hyperlink = f"#{row[1]}!A1"  # Correct format for internal link
+            if c_idx == 3:
+                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+                if row[2] != 'New description':  # Apply bold only if it's not the default 'New description'
+                    cell.font = bold_font
+                ws.row_dimensions[r_idx].height = 45
+
+    # Adjust column widths
+    ws.column_dimensions['B'].width = 20
+    ws.column_dimensions['C'].width = 160  # 8x width of column B
+    ws.column_dimensions['A'].width = 15
+
+    # Save the new workbook
+    wb.save(output_file)
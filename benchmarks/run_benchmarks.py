@@ -0,0 +1,213 @@
+# ------------------------------------------------------------------------------
+# Timing and peak-memory runs for every stage of the three scripts on synthetic
+# inputs (see synthetic.py). Each stage runs --repeat times for the timing and
+# once more under tracemalloc for the peak Python memory, so the numbers of two
+# commits can be compared on the same box. Stages ending in '_reference' run
+# the earlier implementation kept in reference.py next to the current one:
+#
+#   python benchmarks/run_benchmarks.py --size medium --history bench_history.jsonl
+# ------------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)  # The scripts live in the repository root
+
+import pandas as pd
+
+import reference
+import synthetic
+
+# The script names are not valid module names, so they are imported by file name
+extract = importlib.import_module('Extract_Tables&Columns_SourceMatrix')
+object_list = importlib.import_module('Object_List_Update_SourceMatrix')
+catalog = importlib.import_module('ConnectDb-TakeTableVw')
+from source_matrix_cache import SheetCache
+
+# Input sizes: Source Matrix sheets and entity columns per sheet, catalog objects and columns per object
+SIZES = {
+    'small': {'sheets': 30, 'rows': 40, 'objects': 1000, 'columns': 15},
+    'medium': {'sheets': 300, 'rows': 80, 'objects': 10000, 'columns': 20},
+    'large': {'sheets': 1000, 'rows': 120, 'objects': 50000, 'columns': 25},
+}
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def object_list_tables(objects):
+    """DWH and Data Mart tables of an object list of the given size (a quarter of the objects are dm.)."""
+    names = synthetic.sheet_names(objects)
+    tables = []
+    for headers, prefix in [(object_list.DWH_HEADERS, 'dwh.'), (object_list.DM_HEADERS, 'dm.')]:
+        listed = [name for name in names if name.startswith(prefix)]
+        rows = [[number, name, f'Description of {name}' if number % 5 else 'New description'] + [None] * (len(headers) - 3)
+                for number, name in enumerate(listed, 1)]
+        tables.append(pd.DataFrame(rows, columns=headers))
+    return tuple(tables)
+
+def stages(work_dir, matrix_file, catalog_dir, objects):
+    """(name, setup, run) per stage; setup runs once outside the measurements and returns run's arguments.
+
+    The object list writers get an object list of `objects` entries, the catalog size.
+    """
+    def out(name):
+        return os.path.join(work_dir, name)
+
+    env_details = catalog.sqlite_environments(catalog_dir, catalog.environments)
+    env_names = list(env_details)
+
+    def pool():
+        return catalog.ConnectionPool(env_details, catalog.connect_sqlite)
+
+    def warm_cache():
+        cache_file = out('matrix.cache.sqlite')
+        with SheetCache(cache_file, {'entity': extract.ENTITY_CACHE_VERSION}) as cache:
+            extract.extract_source_matrix(matrix_file, cache)
+        return (cache_file,)
+
+    def cached_extract(cache_file):
+        with SheetCache(cache_file, {'entity': extract.ENTITY_CACHE_VERSION}) as cache:
+            extract.extract_source_matrix(matrix_file, cache)
+
+    def fetch(workers):
+        with pool() as connections:
+            return catalog.fetch_all(connections, workers=workers)
+
+    def warm_snapshots():
+        snapshot_dir = out('snapshots')
+        with pool() as connections:
+            catalog.fetch_all(connections, lambda env_name, p: catalog.fetch_incremental(env_name, p, snapshot_dir))
+        return (snapshot_dir,)
+
+    def incremental(snapshot_dir):
+        with pool() as connections:
+            catalog.fetch_all(connections, lambda env_name, p: catalog.fetch_incremental(env_name, p, snapshot_dir))
+
+    def export_columns():
+        with pool() as connections:
+            catalog.export_columns_to_excel(connections, out('columns.xlsx'))
+
+    def diff_columns():
+        with pool() as connections:
+            dfs = catalog.fetch_all(connections, partial(catalog.fetch_data, sql=catalog.qualified_objects_query))
+            column_indexes = catalog.fetch_all(connections, catalog.index_columns)
+        pairs = catalog.parse_diff_pairs([], env_names)
+        return pairs, dfs, column_indexes
+
+    result = [
+        ('extract.read_sheets', lambda: (), lambda: list(extract.read_source_sheets(matrix_file))),
+        ('extract.classify', lambda: (list(extract.read_source_sheets(matrix_file)),),
+         lambda sheets: extract.classify_entity_columns(*extract.build_entity_frames(sheets)[1:])),
+        ('extract.save_xlsx', lambda: extract.extract_source_matrix(matrix_file),
+         lambda columns, pk_fk: extract.save_extracted_columns(out('extracted.xlsx'), columns, pk_fk)),
+        ('extract.cached_rerun', warm_cache, cached_extract),
+        ('object_list.read_b5', lambda: (), lambda: object_list.read_sheet_descriptions(matrix_file)),
+        ('object_list.write', lambda: object_list_tables(objects),
+         lambda dwh_df, dm_df: object_list.create_and_format_workbook(out('object_list.xlsx'), dwh_df, dm_df)),
+        ('object_list.write_reference', lambda: object_list_tables(objects),
+         lambda dwh_df, dm_df: reference.create_and_format_workbook(out('object_list_reference.xlsx'), dwh_df, dm_df)),
+        ('object_list.update', lambda: (), lambda: object_list.update_object_list(matrix_file, out('updated.xlsx'), False)),
+        ('catalog.fetch', lambda: (), lambda: fetch(1)),
+        ('catalog.fetch_concurrent', lambda: (), lambda: fetch(catalog.MAX_WORKERS)),
+        ('catalog.incremental_warm', warm_snapshots, incremental),
+        ('catalog.export_columns', lambda: (), export_columns),
+        ('catalog.diff_columns', diff_columns, catalog.diff_pairs),
+    ]
+    if has_pyarrow():
+        result.insert(3, ('extract.save_parquet', lambda: extract.extract_source_matrix(matrix_file),
+                          lambda columns, pk_fk: extract.save_entity_model(out('extracted.parquet'), columns, pk_fk)))
+    return result
+
+def measure(run, args, repeat, memory):
+    """Wall times of repeat runs and the peak traced memory of one more run (None when memory is off)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*args)
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return times, peak
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every stage of the three scripts on synthetic inputs.')
+    parser.add_argument('--size', choices=list(SIZES), default='small', help='preset input size (default small)')
+    parser.add_argument('--sheets', type=int, help='Source Matrix sheets (overrides the preset)')
+    parser.add_argument('--rows', type=int, help='entity columns per sheet (overrides the preset)')
+    parser.add_argument('--objects', type=int, help='catalog objects per environment (overrides the preset)')
+    parser.add_argument('--columns', type=int, help='columns per catalog object (overrides the preset)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (default 3)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run (it is several times slower)')
+    parser.add_argument('--stage', action='append', help='only run stages whose name starts with this (repeatable)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--history', metavar='FILE', help='append the results as one JSON line to FILE')
+    args = parser.parse_args()
+
+    params = dict(SIZES[args.size])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        matrix_file = os.path.join(work_dir, 'matrix.xlsx')
+        catalog_dir = os.path.join(work_dir, 'catalogs')
+        synthetic.make_source_matrix(matrix_file, params['sheets'], params['rows'], seed=args.seed)
+        synthetic.make_catalog(catalog_dir, list(catalog.environments), params['objects'], params['columns'], seed=args.seed)
+        print(f"Inputs ({args.size}): {params['sheets']} sheets x {params['rows']} entity columns, "
+              f"{params['objects']} objects x {params['columns']} columns per environment")
+        print(f"{'stage':<28}{'best s':>10}{'median s':>10}{'peak MB':>10}")
+
+        results = []
+        for name, setup, run in stages(work_dir, matrix_file, catalog_dir, params['objects']):
+            if args.stage and not any(name.startswith(prefix) for prefix in args.stage):
+                continue
+            # The scripts report progress with print, keep it out of the table
+            with contextlib.redirect_stdout(io.StringIO()):
+                times, peak = measure(run, setup(), args.repeat, not args.no_memory)
+            results.append({'stage': name, 'best': min(times), 'median': statistics.median(times),
+                            'peak_mb': None if peak is None else peak / 1e6})
+            peak_text = '-' if peak is None else f'{peak / 1e6:.1f}'
+            print(f"{name:<28}{min(times):>10.3f}{statistics.median(times):>10.3f}{peak_text:>10}")
+
+    if args.history:
+        record = {'time': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+                  'python': platform.python_version(), 'size': args.size, 'params': params,
+                  'repeat': args.repeat, 'results': results}
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"Results appended to {args.history}")
+
+if __name__ == "__main__":
+    main()
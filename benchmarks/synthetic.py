@@ -0,0 +1,207 @@
+# ------------------------------------------------------------------------------
+# Synthetic inputs for the benchmarks: Source Matrix workbooks (with their
+# 'object list' sheet) and SQLite stand-ins for the DEV/UAT/PROD catalogs, so
+# all three scripts can be measured on a plain Linux box without the Windows
+# paths or the Azure SQL servers.
+#
+#   python benchmarks/synthetic.py matrix DWH_Source_Matrix.xlsx --sheets 300 --rows 80
+#   python benchmarks/synthetic.py catalog catalogs --objects 5000
+# ------------------------------------------------------------------------------
+
+import argparse
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+# Source system ids of Extract_Tables&Columns_SourceMatrix.system_color_map
+SYSTEM_IDS = ['01', '02', '03', '04', '05', '06', '07', '08', '09']
+
+PK_DESCRIPTIONS = ['Primary key', 'PK', 'Unique identifier of the record', 'Unique key']
+FK_DESCRIPTIONS = ['FK to the parent entity', 'Foreign key', 'fk']
+OTHER_DESCRIPTIONS = ['Name', 'Amount in local currency', 'Created on', 'Status code', None, 'N/A']
+
+DATA_TYPES = ['int', 'nvarchar', 'datetime2', 'decimal']
+DWH_SCHEMA_ID = 5  # schema_id of 'dwh' in the stand-in's sys.schemas
+
+DWH_HEADERS = ['Dwh object number', 'Dwh object name', 'Dwh object description', 'Reports Tag', 'checked']
+DM_HEADERS = ['Data mart object number', 'Data mart object name', 'Data mart object description', 'Reports Tag']
+
+def sheet_names(sheets, dm_ratio=0.25):
+    """'dwh.' and 'dm.' object names, every 1/dm_ratio-th sheet being a data mart object."""
+    step = max(1, round(1 / dm_ratio)) if dm_ratio else 0
+    return [f'dm.Mart{index}' if step and index % step == 0 else f'dwh.Table{index}' for index in range(sheets)]
+
+def source_matrix_rows(rnd, index, rows, pk_density, fk_density, lookup_density):
+    """Rows of one Source Matrix sheet in the layout the extractor reads.
+
+    Row 5 holds the description in B5, column D the 'Entity Column Name' marker
+    followed by the entity columns (descriptions in G) and, after a blank row,
+    column A lists PK columns with their source system id in the row below.
+    """
+    yield ['Source', 'Info', None, 'Header', None, None, 'Description']
+    yield [None, 'Object owner', None, None]
+    yield [None, None, None, None]
+    yield [None, None, None, None]
+    yield [None, f'Synthetic object {index}', None, None]
+    yield [None, None, None, 'Entity Column Name', None, None, 'Description']
+
+    lookups = []
+    for position in range(rows):
+        name = f'Column{index}_{position}'
+        draw = rnd.random()
+        if draw < pk_density:
+            description = rnd.choice(PK_DESCRIPTIONS)
+            if rnd.random() < lookup_density:
+                lookups.append(name)
+        elif draw < pk_density + fk_density:
+            description = rnd.choice(FK_DESCRIPTIONS)
+        else:
+            description = rnd.choice(OTHER_DESCRIPTIONS)
+        yield [None, None, None, name, None, None, description]
+
+    yield []
+    for name in lookups:
+        yield [name]
+        yield [f'SRC{rnd.choice(SYSTEM_IDS)}']
+
+def object_list_rows(names, listed_fraction, rnd):
+    """Rows of the 'object list' sheet: the DWH block, one blank row, then the Data Mart block.
+
+    Only listed_fraction of the objects is already listed, the rest are the new
+    objects Object_List_Update_SourceMatrix.py has to add.
+    """
+    listed = [name for name in names if rnd.random() < listed_fraction]
+    dwh = [name for name in listed if name.startswith('dwh.')]
+    dm = [name for name in listed if name.startswith('dm.')]
+
+    yield DWH_HEADERS
+    for number, name in enumerate(dwh, 1):
+        yield [number, name, f'Description of {name}', rnd.choice([None, 'Sales', 'Finance']), None]
+    yield [None]  # The blank row find_headers uses to locate the Data Mart header
+    yield DM_HEADERS
+    for number, name in enumerate(dm, 1):
+        yield [number, name, f'Description of {name}', None]
+
+def make_source_matrix(path, sheets=100, rows=60, pk_density=0.1, fk_density=0.15, lookup_density=0.8,
+                       dm_ratio=0.25, listed_fraction=0.9, seed=1):
+    """Write a synthetic Source Matrix workbook with an 'object list' sheet first and return its sheet names."""
+    rnd = random.Random(seed)
+    names = sheet_names(sheets, dm_ratio)
+    wb = Workbook(write_only=True)
+    object_list = wb.create_sheet('object list')
+    for row in object_list_rows(names, listed_fraction, rnd):
+        object_list.append(row)
+    for index, name in enumerate(names):
+        ws = wb.create_sheet(name)
+        for row in source_matrix_rows(rnd, index, rows, pk_density, fk_density, lookup_density):
+            ws.append(row)
+    wb.save(path)
+    return names
+
+def make_catalog(directory, env_names=('DEV', 'UAT', 'PROD'), objects=1000, columns=20, view_ratio=0.2,
+                 drift=0.02, seed=1):
+    """Write <directory>/<ENV>.db catalogs for ConnectDb-TakeTableVw.py --sqlite.
+
+    Each file holds the INFORMATION_SCHEMA tables the catalog queries read
+    (TABLES, COLUMNS, KEY_COLUMN_USAGE, TABLE_CONSTRAINTS), sys.objects as
+    'objects' and sys.schemas as 'schemas'. Every environment after the first drops, adds and alters about
+    drift of the objects of the previous one, so the schema diff has work to do.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    start = datetime(2024, 1, 1)
+
+    def new_object():
+        return ('VIEW' if rnd.random() < view_ratio else 'BASE TABLE', columns,
+                (start + timedelta(minutes=rnd.randrange(500000))).strftime('%Y-%m-%d %H:%M:%S.000'))
+
+    # Object name -> (object type, column count, modify date), the ids are the object numbers
+    catalog = {f'Object{index}': new_object() for index in range(objects)}
+    next_index = objects
+
+    for env_position, env_name in enumerate(env_names):
+        if env_position:
+            for name in rnd.sample(sorted(catalog), int(len(catalog) * drift)):
+                del catalog[name]
+            for name in rnd.sample(sorted(catalog), int(len(catalog) * drift)):
+                object_type, column_count, _ = catalog[name]
+                catalog[name] = (object_type, column_count + 1, new_object()[2])
+            for _ in range(int(objects * drift)):
+                catalog[f'Object{next_index}'] = new_object()
+                next_index += 1
+
+        path = os.path.join(directory, f'{env_name}.db')
+        if os.path.exists(path):
+            os.remove(path)
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE TABLES (TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_TYPE TEXT);
+            CREATE TABLE objects (object_id INTEGER, name TEXT, schema_id INTEGER, type TEXT, modify_date TEXT, is_ms_shipped INTEGER);
+            CREATE TABLE schemas (schema_id INTEGER, name TEXT);
+            CREATE TABLE COLUMNS (TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER,
+                                  DATA_TYPE TEXT, CHARACTER_MAXIMUM_LENGTH INTEGER, IS_NULLABLE TEXT);
+            CREATE TABLE KEY_COLUMN_USAGE (CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT, TABLE_SCHEMA TEXT,
+                                           TABLE_NAME TEXT, COLUMN_NAME TEXT);
+            CREATE TABLE TABLE_CONSTRAINTS (CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT, CONSTRAINT_TYPE TEXT,
+                                            TABLE_SCHEMA TEXT, TABLE_NAME TEXT);
+        """)
+        tables, sys_objects, column_rows, key_usage, constraints = [], [], [], [], []
+        for name, (object_type, column_count, modify_date) in catalog.items():
+            tables.append(('db', 'dwh', name, object_type))
+            sys_objects.append((int(name[len('Object'):]), name, DWH_SCHEMA_ID, 'U' if object_type == 'BASE TABLE' else 'V', modify_date, 0))
+            for position in range(1, column_count + 1):
+                data_type = DATA_TYPES[position % len(DATA_TYPES)]
+                column_rows.append(('dwh', name, f'Column{position}', position, data_type,
+                                    50 if data_type == 'nvarchar' else None, 'NO' if position == 1 else 'YES'))
+            if object_type == 'BASE TABLE':
+                constraints.append(('dwh', f'PK_{name}', 'PRIMARY KEY', 'dwh', name))
+                key_usage.append(('dwh', f'PK_{name}', 'dwh', name, 'Column1'))
+                if column_count > 1:
+                    constraints.append(('dwh', f'FK_{name}', 'FOREIGN KEY', 'dwh', name))
+                    key_usage.append(('dwh', f'FK_{name}', 'dwh', name, 'Column2'))
+
+        conn.executemany("INSERT INTO TABLES VALUES (?, ?, ?, ?)", tables)
+        conn.executemany("INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?)", sys_objects)
+        conn.execute("INSERT INTO schemas VALUES (?, 'dwh')", (DWH_SCHEMA_ID,))
+        conn.executemany("INSERT INTO COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?)", column_rows)
+        conn.executemany("INSERT INTO KEY_COLUMN_USAGE VALUES (?, ?, ?, ?, ?)", key_usage)
+        conn.executemany("INSERT INTO TABLE_CONSTRAINTS VALUES (?, ?, ?, ?, ?)", constraints)
+        conn.commit()
+        conn.close()
+    return [os.path.join(directory, f'{env_name}.db') for env_name in env_names]
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic inputs for the benchmarks.')
+    subparsers = parser.add_subparsers(dest='kind', required=True)
+
+    matrix = subparsers.add_parser('matrix', help='Source Matrix workbook with an object list sheet')
+    matrix.add_argument('path')
+    matrix.add_argument('--sheets', type=int, default=100)
+    matrix.add_argument('--rows', type=int, default=60, help='entity columns per sheet')
+    matrix.add_argument('--pk-density', type=float, default=0.1)
+    matrix.add_argument('--fk-density', type=float, default=0.15)
+    matrix.add_argument('--dm-ratio', type=float, default=0.25, help='share of dm. sheets')
+    matrix.add_argument('--listed', type=float, default=0.9, help='share of sheets already in the object list')
+    matrix.add_argument('--seed', type=int, default=1)
+
+    catalog = subparsers.add_parser('catalog', help='SQLite stand-ins <dir>/<ENV>.db for ConnectDb-TakeTableVw.py --sqlite')
+    catalog.add_argument('directory')
+    catalog.add_argument('--objects', type=int, default=1000)
+    catalog.add_argument('--columns', type=int, default=20, help='columns per object')
+    catalog.add_argument('--drift', type=float, default=0.02, help='share of objects that differ between environments')
+    catalog.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.kind == 'matrix':
+        names = make_source_matrix(args.path, args.sheets, args.rows, args.pk_density, args.fk_density,
+                                   dm_ratio=args.dm_ratio, listed_fraction=args.listed, seed=args.seed)
+        print(f"Source Matrix with {len(names)} sheets written to {args.path}")
+    else:
+        paths = make_catalog(args.directory, objects=args.objects, columns=args.columns, drift=args.drift, seed=args.seed)
+        print(f"Catalogs written to {', '.join(paths)}")
+
+if __name__ == "__main__":
+    main()
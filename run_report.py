@@ -0,0 +1,158 @@
+# ------------------------------------------------------------------------------
+# Opt-in stage instrumentation shared by the three scripts.
+# A script wraps its stages in `with run_report.stage('name') as s:` and counts
+# what it processed with s.count(rows=..., sheets=..., cells=...). Nothing is
+# recorded until run_report.start() is called (the scripts do that for
+# --report FILE); until then stage() hands out one shared no-op object.
+# finish() writes the JSON report and prints a one-line summary.
+# ------------------------------------------------------------------------------
+
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource  # Peak RSS, not available on Windows
+except ImportError:
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where the platform doesn't report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / 1e6 if platform.system() == 'Darwin' else peak / 1e3
+
+class NullStage:
+    """Stand-in used while instrumentation is off: entering, counting and leaving do nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def count(self, rows=0, sheets=0, cells=0):
+        pass
+
+NULL_STAGE = NullStage()
+
+class Stage:
+    """One timed stage: wall and CPU time, traced memory and the rows, sheets and cells it processed.
+
+    RSS is only reported for the whole process: ru_maxrss is a lifetime peak, so
+    a stage reading it would show the high mark of everything before it.
+    """
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+        self.rows = self.sheets = self.cells = 0
+
+    def count(self, rows=0, sheets=0, cells=0):
+        self.rows += rows
+        self.sheets += sheets
+        self.cells += cells
+
+    def __enter__(self):
+        self.report.enter()
+        self.wall_start = time.perf_counter()
+        # CPU time of the thread running the stage, so concurrently fetched environments don't count each other
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        record = {
+            'stage': self.name,
+            'wall_s': round(time.perf_counter() - self.wall_start, 4),
+            'cpu_s': round(time.thread_time() - self.cpu_start, 4),
+            'traced_peak_mb': round(tracemalloc.get_traced_memory()[1] / 1e6, 3) if tracemalloc.is_tracing() else None,
+            'rows': self.rows,
+            'sheets': self.sheets,
+            'cells': self.cells,
+            'failed': exc_info[0] is not None
+        }
+        self.report.leave(record)
+        return False
+
+class RunReport:
+    """Stage records of one run. Stages may run in several threads, and nested stages are recorded separately."""
+
+    def __init__(self, script, trace_memory=False):
+        self.script = script
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.open_stages = 0
+        self.lock = threading.Lock()
+        self.started = datetime.now()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if trace_memory:
+            tracemalloc.start()
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def enter(self):
+        with self.lock:
+            # The traced peak is reset when no other stage is running, otherwise it covers the stages that overlap
+            if self.trace_memory and self.open_stages == 0:
+                tracemalloc.reset_peak()
+            self.open_stages += 1
+
+    def leave(self, record):
+        with self.lock:
+            self.open_stages -= 1
+            self.stages.append(record)
+
+    def as_dict(self):
+        return {
+            'script': self.script,
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall_s': round(time.perf_counter() - self.wall_start, 4),
+            'cpu_s': round(time.process_time() - self.cpu_start, 4),
+            'process_peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages
+        }
+
+    def summary(self, report):
+        """One line: totals, then the three slowest stages."""
+        slowest = sorted(report['stages'], key=lambda record: record['wall_s'], reverse=True)[:3]
+        rss = '' if report['process_peak_rss_mb'] is None else f", peak RSS {report['process_peak_rss_mb']:.0f} MB"
+        stages = ', '.join(f"{record['stage']} {record['wall_s']:.2f} s" for record in slowest)
+        return f"Run report: {report['wall_s']:.2f} s wall, {report['cpu_s']:.2f} s CPU{rss}; slowest: {stages or 'none'}"
+
+    def finish(self, report_file):
+        report = self.as_dict()
+        if self.trace_memory:
+            tracemalloc.stop()
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"{self.summary(report)} (details in {os.path.abspath(report_file)})")
+        return report
+
+# The report of the running script, None while instrumentation is off
+active = None
+
+def start(script, trace_memory=False):
+    """Turn instrumentation on for this process."""
+    global active
+    active = RunReport(script, trace_memory)
+    return active
+
+def stage(name):
+    """Context manager timing one stage, or the shared no-op stage when instrumentation is off."""
+    return NULL_STAGE if active is None else active.stage(name)
+
+def finish(report_file):
+    """Write the JSON report, print the one-line summary and turn instrumentation off again."""
+    global active
+    if active is None:
+        return None
+    report, active = active.finish(report_file), None
+    return report
@@ -0,0 +1,218 @@
+# ------------------------------------------------------------------------------
+# Per-sheet cache shared by Extract_Tables&Columns_SourceMatrix.py and
+# Object_List_Update_SourceMatrix.py.
+# Every sheet of the Source Matrix is keyed by a hash of its XML part inside the
+# .xlsx (with the shared strings it uses), so a re-run only parses the sheets
+# whose content changed. Results are kept per sheet and per field ('entity' for
+# the extracted entity columns with their PK/FK info, 'b5' for the description)
+# as JSON in a small SQLite file in a per-user cache directory (the workbooks
+# live in shared folders). Every field is stored with the version of the logic
+# that produced it, so results of an older extractor are dropped, not reused.
+# It also holds the workbook helpers of the batch modes, which need the sheet
+# list of a workbook without loading it.
+# ------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sqlite3
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+WORKSHEET_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+
+# Cells of type "s" hold an index into xl/sharedStrings.xml instead of the text itself
+SHARED_STRING_CELL = re.compile(rb'(?<=\bt="s")[^>]*>\s*<v>(\d+)</v>')
+SHARED_STRING_ITEM = re.compile(rb'<si>.*?</si>|<si/>', re.S)
+
+MISSING = object()  # Returned by SheetCache.get when a sheet has to be parsed again
+
+CACHE_FORMAT = 2  # Layout of the cache file (PRAGMA user_version), files of another layout are emptied
+
+def cache_dir():
+    """Per-user directory of the cache files: SOURCE_MATRIX_CACHE_DIR, else %LOCALAPPDATA% or ~/.cache."""
+    if os.environ.get('SOURCE_MATRIX_CACHE_DIR'):
+        return os.environ['SOURCE_MATRIX_CACHE_DIR']
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'SourceMatrix')
+
+def default_cache_file(source_file):
+    """Cache file of one workbook: 'DWH_Source_Matrix.xlsx' -> '<cache dir>/DWH_Source_Matrix-<path hash>.cache.sqlite'.
+
+    The hash of the full path keeps workbooks of the same name in different folders apart.
+    """
+    path_hash = hashlib.sha256(os.path.normcase(os.path.abspath(source_file)).encode('utf-8')).hexdigest()[:12]
+    os.makedirs(cache_dir(), exist_ok=True)
+    return os.path.join(cache_dir(), f'{os.path.splitext(os.path.basename(source_file))[0]}-{path_hash}.cache.sqlite')
+
+def cache_version(*settings):
+    """Version of a cached field: a fingerprint of a revision number and the settings its results depend on.
+
+    The revision number is bumped by hand when the parsing code changes; changing one
+    of the settings (keyword lists, color map, ...) changes the version by itself.
+    """
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+# Cell values that JSON has no type for are stored as {tag: text}
+JSON_TAGS = [('__datetime__', datetime, datetime.fromisoformat), ('__date__', date, date.fromisoformat),
+             ('__time__', time, time.fromisoformat), ('__timedelta__', timedelta, lambda text: timedelta(seconds=float(text)))]
+
+def encode_json(value):
+    def tag(obj):
+        # datetime is a subclass of date, so the first matching type in JSON_TAGS wins
+        for key, value_type, _ in JSON_TAGS:
+            if isinstance(obj, value_type):
+                return {key: str(obj.total_seconds()) if value_type is timedelta else obj.isoformat()}
+        raise TypeError(f'Cannot cache a value of type {type(obj).__name__}')
+    return json.dumps(value, default=tag)
+
+def decode_json(text):
+    def untag(obj):
+        if len(obj) == 1:
+            for key, _, parse in JSON_TAGS:
+                if key in obj:
+                    return parse(obj[key])
+        return obj
+    return json.loads(text, object_hook=untag)
+
+def find_workbooks(paths):
+    """Expand files and directories into a sorted list of .xlsx workbooks (Excel's '~$' lock files are skipped)."""
+    workbooks = []
+    for path in paths:
+        if os.path.isdir(path):
+            workbooks.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.lower().endswith('.xlsx') and not name.startswith('~$'))
+        else:
+            workbooks.append(path)
+    return workbooks
+
+def output_stems(source_files):
+    """Output file name stem per workbook of a batch, unique within the batch.
+
+    A workbook's stem is its file name; workbooks of the same name get the name of
+    their folder in front ('Finance_DWH_Source_Matrix'), and a number if that is
+    still not enough, so parallel workers never write the same output file.
+    """
+    def key(stem):
+        return os.path.normcase(stem)  # Windows file names ignore case
+
+    stems = [os.path.splitext(os.path.basename(source_file))[0] for source_file in source_files]
+    counts = Counter(key(stem) for stem in stems)
+    stems = [f'{os.path.basename(os.path.dirname(os.path.abspath(source_file)))}_{stem}' if counts[key(stem)] > 1 else stem
+             for source_file, stem in zip(source_files, stems)]
+    counts, seen = Counter(key(stem) for stem in stems), Counter()
+    for index, stem in enumerate(stems):
+        if counts[key(stem)] > 1:
+            seen[key(stem)] += 1
+            stems[index] = f'{stem}_{seen[key(stem)]}'
+    return stems
+
+def worksheet_titles(source_file):
+    """Worksheet titles in workbook order, read from the workbook part only."""
+    with zipfile.ZipFile(source_file) as archive:
+        return [title for title, _ in worksheet_parts(archive)]
+
+def worksheet_parts(archive):
+    """Worksheet titles in workbook order, each with the name of its XML part in the archive."""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels.iter(f'{PACKAGE_REL_NS}Relationship'):
+        if rel.get('Type') == WORKSHEET_REL_TYPE:
+            target = rel.get('Target')
+            # Targets are relative to xl/, or absolute from the package root when they start with '/'
+            targets[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(f'xl/{target}')
+    return [(sheet.get('name'), targets[sheet.get(f'{REL_NS}id')])
+            for sheet in workbook.iter(f'{MAIN_NS}sheet') if sheet.get(f'{REL_NS}id') in targets]
+
+def sheet_hashes(source_file):
+    """Hash the XML part of every worksheet without parsing the workbook.
+
+    Shared string indices are replaced by the strings themselves before hashing,
+    so editing a text changes the key, while strings renumbered by an edit of
+    another sheet don't.
+    Returns an ordered {sheet title: hex digest} dict.
+    """
+    with zipfile.ZipFile(source_file) as archive:
+        try:
+            shared_strings = SHARED_STRING_ITEM.findall(archive.read('xl/sharedStrings.xml'))
+        except KeyError:
+            shared_strings = []
+
+        def resolve(match):
+            index = int(match.group(1))
+            return shared_strings[index] if index < len(shared_strings) else match.group(0)
+
+        hashes = {}
+        for title, part in worksheet_parts(archive):
+            hashes[title] = hashlib.sha256(SHARED_STRING_CELL.sub(resolve, archive.read(part))).hexdigest()
+        return hashes
+
+class SheetCache:
+    """On-disk per-sheet cache of parsed Source Matrix results.
+
+    versions maps every field the caller reads or writes to the version of the
+    logic behind it (see cache_version). open() hashes the current workbook,
+    evicts sheets that no longer exist and drops results of other versions,
+    get()/put() read and store one field of one sheet, and every get() is counted
+    as a hit or a miss for the summary printed by report().
+    """
+
+    def __init__(self, cache_file, versions=None):
+        self.conn = sqlite3.connect(cache_file)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_FORMAT:
+            self.conn.execute("DROP TABLE IF EXISTS sheets")
+            self.conn.execute(f"PRAGMA user_version = {CACHE_FORMAT}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheets (sheet TEXT, field TEXT, hash TEXT, version TEXT, value TEXT, PRIMARY KEY (sheet, field))"
+        )
+        self.versions = dict(versions or {})
+        self.hashes = {}
+        self.hits = self.misses = self.evicted = self.outdated = 0
+
+    def open(self, source_file):
+        """Hash the sheets of source_file, drop the cached sheets it no longer has and outdated results. Returns the hashes."""
+        self.hashes = sheet_hashes(source_file)
+        cached = [sheet for (sheet,) in self.conn.execute("SELECT DISTINCT sheet FROM sheets")]
+        deleted = [(sheet,) for sheet in cached if sheet not in self.hashes]
+        self.conn.executemany("DELETE FROM sheets WHERE sheet = ?", deleted)
+        for field, version in self.versions.items():
+            self.outdated += self.conn.execute("DELETE FROM sheets WHERE field = ? AND version != ?", (field, version)).rowcount
+        self.conn.commit()
+        self.evicted += len(deleted)
+        return self.hashes
+
+    def get(self, sheet, field):
+        """Cached value of one field of a sheet, or MISSING when the sheet changed or was never parsed."""
+        row = self.conn.execute("SELECT value FROM sheets WHERE sheet = ? AND field = ? AND hash = ? AND version = ?",
+                                (sheet, field, self.hashes.get(sheet), self.versions.get(field, ''))).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return decode_json(row[0])
+
+    def put(self, sheet, field, value):
+        self.conn.execute("INSERT OR REPLACE INTO sheets VALUES (?, ?, ?, ?, ?)",
+                          (sheet, field, self.hashes[sheet], self.versions.get(field, ''), encode_json(value)))
+
+    def report(self):
+        outdated = f", {self.outdated} outdated results dropped" if self.outdated else ''
+        return f"Sheet cache: {self.hits} hits, {self.misses} misses, {self.evicted} deleted sheets evicted{outdated}"
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
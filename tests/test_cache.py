@@ -0,0 +1,56 @@
+# ------------------------------------------------------------------------------
+# Tests for the per-sheet cache: results of another logic version are dropped,
+# values survive the JSON round trip, and cached and fresh extractions agree.
+# ------------------------------------------------------------------------------
+
+import importlib
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The scripts live in the repository root
+
+import source_matrix_cache
+from source_matrix_cache import MISSING, SheetCache
+from test_extract import write_matrix
+
+# The script name is not a valid module name, so it is imported by file name
+extract = importlib.import_module('Extract_Tables&Columns_SourceMatrix')
+
+@pytest.fixture
+def matrix_file(tmp_path):
+    path = tmp_path / 'matrix.xlsx'
+    write_matrix(path, sheets=4, rows=10)
+    return str(path)
+
+def test_json_round_trip():
+    values = [1, 2.5, 'text', None, True, datetime(2024, 12, 13, 10, 0, 0, 5), date(2024, 12, 13), time(8, 30),
+              timedelta(hours=36), {'type': 'PK', 'nested': [1, 'a']}]
+    assert source_matrix_cache.decode_json(source_matrix_cache.encode_json(values)) == values
+
+def test_default_cache_file_is_per_user_and_per_path(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_MATRIX_CACHE_DIR', str(tmp_path / 'cache'))
+    first = source_matrix_cache.default_cache_file(os.path.join('a', 'DWH_Source_Matrix.xlsx'))
+    second = source_matrix_cache.default_cache_file(os.path.join('b', 'DWH_Source_Matrix.xlsx'))
+    assert os.path.dirname(first) == str(tmp_path / 'cache')
+    assert first != second
+
+def test_other_versions_are_dropped(tmp_path, matrix_file):
+    cache_file = str(tmp_path / 'matrix.cache.sqlite')
+    fresh = extract.extract_source_matrix(matrix_file)
+
+    for version, hits in [('v1', 0), ('v1', 7), ('v2', 0)]:
+        with SheetCache(cache_file, {'entity': version}) as cache:
+            assert extract.extract_source_matrix(matrix_file, cache) == fresh
+        assert cache.hits == hits
+
+    with SheetCache(cache_file, {'entity': 'v1'}) as cache:
+        cache.open(matrix_file)
+        assert cache.get('dwh.Table0', 'entity') is MISSING
+
+def test_output_stems_are_unique_within_a_batch():
+    files = [os.path.join('a', 'Finance', 'DWH.xlsx'), os.path.join('b', 'Finance', 'DWH.xlsx'),
+             os.path.join('Sales', 'DWH.xlsx'), os.path.join('Sales', 'Other.xlsx')]
+    assert source_matrix_cache.output_stems(files) == ['Finance_DWH_1', 'Finance_DWH_2', 'Sales_DWH', 'Other']
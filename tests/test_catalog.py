@@ -0,0 +1,158 @@
+# ------------------------------------------------------------------------------
+# Tests for ConnectDb-TakeTableVw.py against the SQLite stand-in of the
+# environments (connect_sqlite): the connection pool, the incremental snapshots
+# and the schema diff.
+# ------------------------------------------------------------------------------
+
+import importlib
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The scripts live in the repository root
+
+# The script name is not a valid module name, so it is imported by file name
+catalog = importlib.import_module('ConnectDb-TakeTableVw')
+
+SCHEMAS = {'dwh': 5, 'dm': 6}
+
+def write_catalog(path, objects):
+    """Stand-in catalog with the given (object_id, schema, name, type, modify_date, columns) objects.
+
+    type is 'BASE TABLE' or 'VIEW', columns a list of (name, data type) pairs.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE TABLES (TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_TYPE TEXT);
+        CREATE TABLE objects (object_id INTEGER, name TEXT, schema_id INTEGER, type TEXT, modify_date TEXT, is_ms_shipped INTEGER);
+        CREATE TABLE schemas (schema_id INTEGER, name TEXT);
+        CREATE TABLE COLUMNS (TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER,
+                              DATA_TYPE TEXT, CHARACTER_MAXIMUM_LENGTH INTEGER, IS_NULLABLE TEXT);
+        CREATE TABLE KEY_COLUMN_USAGE (CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT, TABLE_SCHEMA TEXT,
+                                       TABLE_NAME TEXT, COLUMN_NAME TEXT);
+        CREATE TABLE TABLE_CONSTRAINTS (CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT, CONSTRAINT_TYPE TEXT,
+                                        TABLE_SCHEMA TEXT, TABLE_NAME TEXT);
+    """)
+    conn.executemany("INSERT INTO schemas VALUES (?, ?)", [(schema_id, name) for name, schema_id in SCHEMAS.items()])
+    for object_id, schema, name, object_type, modify_date, columns in objects:
+        conn.execute("INSERT INTO TABLES VALUES ('db', ?, ?, ?)", (schema, name, object_type))
+        conn.execute("INSERT INTO objects VALUES (?, ?, ?, ?, ?, 0)",
+                     (object_id, name, SCHEMAS[schema], 'U' if object_type == 'BASE TABLE' else 'V', modify_date))
+        conn.executemany("INSERT INTO COLUMNS VALUES (?, ?, ?, ?, ?, NULL, 'YES')",
+                         [(schema, name, column, position, data_type) for position, (column, data_type) in enumerate(columns, 1)])
+    conn.commit()
+    conn.close()
+
+def high_water_mark(snapshot_dir, env_name):
+    with sqlite3.connect(os.path.join(snapshot_dir, f'{env_name}_catalog.sqlite')) as snapshot:
+        return snapshot.execute("SELECT value FROM snapshot_info WHERE key = 'high_water_mark'").fetchone()[0]
+
+def snapshot_fetch(directory, snapshot_dir):
+    with catalog.ConnectionPool(catalog.sqlite_environments(directory, ['DEV']), catalog.connect_sqlite) as pool:
+        df = catalog.fetch_incremental('DEV', pool, snapshot_dir)
+    return sorted(zip(df['Object_Schema'], df['Object_Name'], df['Object_Type']))
+
+def test_incremental_snapshot(tmp_path):
+    path, snapshot_dir = str(tmp_path / 'DEV.db'), str(tmp_path / 'snapshots')
+    columns = [('Id', 'int')]
+    write_catalog(path, [(1, 'dwh', 'Customer', 'BASE TABLE', '2024-12-01 08:00:00.000', columns),
+                         (2, 'dm', 'Customer', 'VIEW', '2024-12-13 09:30:00.000', columns),
+                         (3, 'dwh', 'Orders', 'BASE TABLE', '2024-11-20 10:00:00.000', columns)])
+
+    # First run: empty snapshot, everything is loaded
+    assert snapshot_fetch(str(tmp_path), snapshot_dir) == [('dm', 'Customer', 'VIEW'), ('dwh', 'Customer', 'BASE TABLE'),
+                                                           ('dwh', 'Orders', 'BASE TABLE')]
+    assert high_water_mark(snapshot_dir, 'DEV') == '2024-12-13 09:30:00.000'
+
+    # Second run: Orders became a view, dm.Customer was dropped and dm.Sales added
+    write_catalog(path, [(1, 'dwh', 'Customer', 'BASE TABLE', '2024-12-01 08:00:00.000', columns),
+                         (3, 'dwh', 'Orders', 'VIEW', '2024-12-14 11:00:00.000', columns),
+                         (4, 'dm', 'Sales', 'VIEW', '2024-12-15 12:00:00.000', columns)])
+    assert snapshot_fetch(str(tmp_path), snapshot_dir) == [('dm', 'Sales', 'VIEW'), ('dwh', 'Customer', 'BASE TABLE'),
+                                                           ('dwh', 'Orders', 'VIEW')]
+    assert high_water_mark(snapshot_dir, 'DEV') == '2024-12-15 12:00:00.000'
+
+    # Third run: the newest object is gone and another one has an older date, the mark doesn't move back
+    write_catalog(path, [(1, 'dwh', 'Customer', 'BASE TABLE', '2024-12-01 08:00:00.000', columns),
+                         (3, 'dwh', 'Orders', 'VIEW', '2024-12-14 11:00:00.000', columns),
+                         (5, 'dm', 'Stock', 'VIEW', '2024-12-02 07:00:00.000', columns)])
+    snapshot_fetch(str(tmp_path), snapshot_dir)
+    assert high_water_mark(snapshot_dir, 'DEV') == '2024-12-15 12:00:00.000'
+
+def test_old_snapshot_layout_is_reloaded(tmp_path):
+    path, snapshot_dir = str(tmp_path / 'DEV.db'), str(tmp_path / 'snapshots')
+    write_catalog(path, [(1, 'dwh', 'Customer', 'BASE TABLE', '2024-12-01 08:00:00.000', [('Id', 'int')])])
+    os.makedirs(snapshot_dir)
+    with sqlite3.connect(os.path.join(snapshot_dir, 'DEV_catalog.sqlite')) as old:
+        old.execute('CREATE TABLE objects (object_id INTEGER PRIMARY KEY, object_type TEXT, object_name TEXT, modify_date TEXT)')
+        old.execute('CREATE TABLE snapshot_info (key TEXT PRIMARY KEY, value TEXT)')
+        old.execute("INSERT INTO snapshot_info VALUES ('high_water_mark', '2030-01-01 00:00:00.000')")
+
+    assert snapshot_fetch(str(tmp_path), snapshot_dir) == [('dwh', 'Customer', 'BASE TABLE')]
+
+def diff_records(tmp_path, dev_objects, uat_objects):
+    write_catalog(str(tmp_path / 'DEV.db'), dev_objects)
+    write_catalog(str(tmp_path / 'UAT.db'), uat_objects)
+    with catalog.ConnectionPool(catalog.sqlite_environments(str(tmp_path), ['DEV', 'UAT']), catalog.connect_sqlite) as pool:
+        dfs = catalog.fetch_all(pool, lambda env_name, p: catalog.fetch_data(env_name, p, catalog.qualified_objects_query))
+        column_indexes = catalog.fetch_all(pool, catalog.index_columns)
+    return catalog.diff_pairs([('DEV', 'UAT')], dfs, column_indexes)
+
+def test_diff_keeps_schemas_apart(tmp_path):
+    date = '2024-12-01 08:00:00.000'
+    records = diff_records(tmp_path, [
+        (1, 'dwh', 'Customer', 'BASE TABLE', date, [('Id', 'int')]),
+        (2, 'dm', 'Customer', 'VIEW', date, [('Name', 'nvarchar')]),
+        (3, 'dwh', 'Orders', 'BASE TABLE', date, [('Id', 'int')]),
+        (4, 'dwh', 'Product', 'BASE TABLE', date, [('Id', 'int'), ('Price', 'decimal')]),
+    ], [
+        (1, 'dwh', 'Customer', 'BASE TABLE', date, [('Id', 'int')]),
+        (3, 'dwh', 'Orders', 'VIEW', date, [('Id', 'int')]),
+        (4, 'dwh', 'Product', 'BASE TABLE', date, [('Id', 'int'), ('Price', 'int')]),
+        (5, 'dm', 'Orders', 'VIEW', date, [('Id', 'int')]),
+    ])
+    changes = sorted((record['Change'], record['Object_Type'], record['Object_Name'], record['Detail']) for record in records)
+    assert changes == [
+        ('added', 'VIEW', 'dm.Orders', ''),
+        ('changed', 'BASE TABLE', 'dwh.Product', 'columns changed: Price'),
+        ('changed', 'VIEW', 'dwh.Orders', 'type BASE TABLE -> VIEW'),
+        ('removed', 'VIEW', 'dm.Customer', ''),
+    ]
+
+def test_parse_diff_pairs():
+    env_names = ['DEV', 'UAT', 'PROD']
+    assert catalog.parse_diff_pairs([], env_names) == [('DEV', 'UAT'), ('UAT', 'PROD')]
+    assert catalog.parse_diff_pairs(['DEV:PROD'], env_names) == [('DEV', 'PROD')]
+    for value in ['DEV', 'DEV:', ':UAT', 'DEV:QA', 'QA:UAT']:
+        with pytest.raises(ValueError):
+            catalog.parse_diff_pairs([value], env_names)
+
+def write_environments(directory, env_names):
+    """One stand-in catalog per environment, each with a table named after it."""
+    for object_id, env_name in enumerate(env_names, 1):
+        write_catalog(os.path.join(directory, f'{env_name}.db'),
+                      [(object_id, 'dwh', f'{env_name}_Table', 'BASE TABLE', '2024-12-01 08:00:00.000', [('Id', 'int')])])
+
+def test_concurrent_fetch_reuses_pooled_connections(tmp_path):
+    env_names = ['DEV', 'UAT', 'PROD']
+    write_environments(str(tmp_path), env_names)
+    with catalog.ConnectionPool(catalog.sqlite_environments(str(tmp_path), env_names), catalog.connect_sqlite) as pool:
+        for _ in range(2):
+            dfs = catalog.fetch_all(pool, workers=3)
+            assert list(dfs) == env_names
+            assert {env_name: df['Object_Name'].tolist() for env_name, df in dfs.items()} == \
+                {env_name: [f'{env_name}_Table'] for env_name in env_names}
+        assert pool.opened == len(env_names)
+
+def test_failing_environment_is_left_out(tmp_path):
+    write_environments(str(tmp_path), ['DEV', 'PROD'])
+    env_details = catalog.sqlite_environments(str(tmp_path), ['DEV', 'UAT', 'PROD'])
+    env_details['UAT']['database'] = str(tmp_path / 'missing' / 'UAT.db')  # ATTACH can't create it, the connect fails
+    with catalog.ConnectionPool(env_details, catalog.connect_sqlite) as pool:
+        dfs = catalog.fetch_all(pool, workers=3)
+    assert list(dfs) == ['DEV', 'PROD']
+    assert dfs['PROD']['Object_Name'].tolist() == ['PROD_Table']
@@ -0,0 +1,193 @@
+# ------------------------------------------------------------------------------
+# Regression tests for the Source Matrix extraction: the streamed, vectorized
+# extractor must give exactly what the original per-row loop (version 1.6 of
+# Extract_Tables&Columns_SourceMatrix.py, kept below as reference_extract) gave,
+# and the PK source system lookup must beat the old quadratic scan of column A
+# (a timing check that only runs with RUN_BENCHMARKS=1).
+# ------------------------------------------------------------------------------
+
+import importlib
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The scripts live in the repository root
+
+# The script name is not a valid module name, so it is imported by file name
+extract = importlib.import_module('Extract_Tables&Columns_SourceMatrix')
+
+DESCRIPTIONS = ['Primary key', 'PK', 'pk of the order', 'Unique identifier', 'Unique key', 'Foreign key', 'FK',
+                'fk to customer', 'PKG size', 'Name', 'Amount', 'N/A', None]
+
+def reference_extract(source_file):
+    """The per-row loop of version 1.6: every sheet through pd.read_excel, column A scanned per PK."""
+    convert_to_argb, system_color_map = extract.convert_to_argb, extract.system_color_map
+    extracted_columns, pk_fk_info_columns = {}, {}
+    excel_file = pd.ExcelFile(source_file)
+    for sheet in excel_file.sheet_names:
+        df = pd.read_excel(source_file, sheet_name=sheet)
+        if df.shape[1] <= 6:
+            continue
+        entity_row = df[df.iloc[:, 3].str.contains('entity column name', case=False, na=False)]
+        if entity_row.empty:
+            continue
+        start_index = entity_row.index[0] + 1
+        entity_columns, pk_fk_info = [], []
+        for idx, value in df.iloc[start_index:, 3].items():
+            if pd.isna(value):
+                break
+            entity_columns.append(value)
+            description = df.iloc[idx, 6]
+            source_system, color = 'DWH', convert_to_argb('EAD1DC')
+            if not pd.isna(description) and ('primary key' in description.lower() or 'unique key' in description.lower()):
+                match_row = None
+                for search_idx, search_value in df.iloc[:, 0].items():
+                    if search_value == value:
+                        match_row = search_idx
+                        break
+                if match_row is not None and match_row < len(df) - 1:
+                    column_a_value = str(df.iloc[match_row + 1, 0])
+                    if len(column_a_value) >= 2 and column_a_value[-2:] in system_color_map:
+                        source_system, color = system_color_map[column_a_value[-2:]]
+            column_info = {'type': '', 'custom_identifier': '',
+                           'description': str(description) if not pd.isna(description) else '',
+                           'source_system': source_system, 'color': color}
+            if pd.isna(description):
+                pass
+            elif re.search(r'\bPK\b', str(description), re.IGNORECASE) or \
+                    any(kw in str(description).lower() for kw in ['primary key', 'unique identifier', 'unique key']):
+                column_info['type'] = 'PK'
+                column_info['custom_identifier'] = f'PK{len(pk_fk_info) + 1:02d}'
+            elif 'fk' in str(description).lower() or 'foreign key' in str(description).lower():
+                column_info['type'] = 'FK'
+                column_info['custom_identifier'] = f'FK{len(pk_fk_info) + 1:02d}'
+            pk_fk_info.append(column_info)
+        extracted_columns[sheet] = entity_columns
+        pk_fk_info_columns[sheet] = pk_fk_info
+    return extracted_columns, pk_fk_info_columns
+
+def sheet_rows(rnd, index, rows):
+    """Rows of one Source Matrix sheet: header, marker, entity columns, then the column A lookups.
+
+    Column A repeats some entity names with another system id below them (the
+    first occurrence wins) and ends with a lookup in the very last row, which
+    has no row below and so keeps the DWH default.
+    """
+    names = [f'Col{index}_{position}' for position in range(rows)]
+    yield ['Source', 'Info', None, 'Header', None, None, 'Description']
+    yield [None, f'Object {index}']
+    yield [None, None, None, 'Entity Column Name', None, None, 'Description']
+    for name in names:
+        yield [None, None, None, name, None, None, rnd.choice(DESCRIPTIONS)]
+    yield []
+    for name in rnd.sample(names, rows // 2):
+        yield [name]
+        yield [f'SRC{rnd.randint(0, 10):02d}']
+    for name in rnd.sample(names, rows // 10):  # Duplicates: only the first occurrence counts
+        yield [name]
+        yield ['SRC01']
+    yield [names[-1]]  # Lookup in the last row of the sheet
+
+def write_matrix(path, sheets=12, rows=40, seed=7):
+    rnd = random.Random(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+    wb.create_sheet('object list').append(['Dwh object number', 'Dwh object name'])
+    for index in range(sheets):
+        ws = wb.create_sheet(f'dwh.Table{index}')
+        for row in sheet_rows(rnd, index, rows):
+            ws.append(row or [None])
+    # A sheet with a marker but not enough columns and one without a marker are both skipped
+    wb.create_sheet('narrow').append(['a', None, None, 'Entity Column Name'])
+    wb.create_sheet('no marker').append(['a', None, None, 'x', None, None, 'y'])
+    wb.save(path)
+
+@pytest.fixture(scope='module')
+def matrix_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('matrix') / 'matrix.xlsx'
+    write_matrix(path)
+    return str(path)
+
+def test_extraction_matches_reference_loop(matrix_file):
+    assert extract.extract_source_matrix(matrix_file) == reference_extract(matrix_file)
+
+def test_classify_entity_columns_matches_reference_loop(matrix_file):
+    sheet_names, entity_df, column_a_df = extract.build_entity_frames(extract.read_source_sheets(matrix_file))
+    classified = extract.classify_entity_columns(entity_df, column_a_df)
+    assert extract.split_by_sheet(sheet_names, classified) == reference_extract(matrix_file)
+
+def test_duplicates_and_last_row_lookup(tmp_path):
+    path = tmp_path / 'edge.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'dwh.Edge'
+    for row in [['Source', None, None, 'Header', None, None, 'Description'],
+                [None, None, None, 'Entity Column Name', None, None, 'Description'],
+                [None, None, None, 'Id', None, None, 'Primary key'],
+                [None, None, None, 'Code', None, None, 'Unique key'],
+                [None], ['Id'], ['SRC03'], ['Id'], ['SRC01'], ['Code']]:
+        ws.append(row)
+    wb.save(path)
+
+    _, pk_fk_info_columns = extract.extract_source_matrix(str(path))
+    id_info, code_info = pk_fk_info_columns['dwh.Edge']
+    assert (id_info['source_system'], id_info['custom_identifier']) == ('SalesForce', 'PK01')
+    assert (code_info['source_system'], code_info['custom_identifier']) == ('DWH', 'PK02')
+    assert extract.extract_source_matrix(str(path)) == reference_extract(str(path))
+
+def pk_sheet_cells(rows):
+    """Cells of one sheet where every entity column is a PK listed in column A, in reverse order."""
+    names = [f'Col{position}' for position in range(rows)]
+    column_a = [None] * (rows + 1)
+    for name in reversed(names):
+        column_a.extend([name, 'SRC02'])
+    return 'dwh.Big', column_a, names, ['Primary key'] * rows
+
+def quadratic_lookup(sheet, column_a, names, descriptions):
+    """Source systems the way version 1.6 found them: column A scanned from the top for every PK."""
+    systems = []
+    for name in names:
+        match_row = next((row for row, value in enumerate(column_a) if value == name), None)
+        below = str(column_a[match_row + 1]) if match_row is not None and match_row < len(column_a) - 1 else ''
+        systems.append(extract.system_color_map[below[-2:]][0] if below[-2:] in extract.system_color_map else 'DWH')
+    return systems
+
+def best_time(function, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def test_large_sheet_lookup():
+    classified = extract.classify_entity_columns(*extract.build_entity_frames([pk_sheet_cells(16000)])[1:])
+    assert (classified['source_system'] == 'AXAPTA').all()
+
+@pytest.mark.skipif(not os.environ.get('RUN_BENCHMARKS'), reason='timing check, run with RUN_BENCHMARKS=1')
+def test_source_system_lookup_beats_quadratic_scan():
+    cells = pk_sheet_cells(4000)
+    frames = extract.build_entity_frames([cells])[1:]
+    assert extract.classify_entity_columns(*frames)['source_system'].tolist() == quadratic_lookup(*cells)
+
+    # The per-PK scan does about 4000 x 4000 comparisons here, the vectorized lookup a few passes over 12000 cells,
+    # so it has to win by far more than the margin even on a busy machine
+    assert best_time(extract.classify_entity_columns, *frames) * 10 < best_time(quadratic_lookup, *cells, repeat=1)
+
+@pytest.mark.parametrize('use_cache', [True, False])
+def test_batch_skips_a_corrupt_workbook(tmp_path, monkeypatch, use_cache):
+    monkeypatch.setenv('SOURCE_MATRIX_CACHE_DIR', str(tmp_path / 'cache'))
+    source_dir = tmp_path / 'sources'
+    source_dir.mkdir()
+    write_matrix(source_dir / 'm.xlsx', sheets=3, rows=10)
+    (source_dir / 'broken.xlsx').write_bytes(b'not a workbook')
+
+    output_files = extract.extract_batch(extract.find_workbooks([str(source_dir)]), str(tmp_path / 'out'), 'ts',
+                                         workers=1, use_cache=use_cache)
+    assert [os.path.basename(output_file) for output_file in output_files] == ['m_Entity_Columns_ts.xlsx']